@@ -0,0 +1,117 @@
+import time
+from typing import Optional, Tuple
+from config import settings
+from app.metrics import metrics
+
+# Decisions returned by AdmissionController.admit
+ADMIT = "admit"
+DEGRADE = "degrade"
+REJECT = "reject"
+
+class AdmissionController:
+    """
+    Admission control for /query based on in-flight requests and recent
+    upstream latency.
+
+    Requests are admitted normally until either signal crosses its degrade
+    threshold, then served in degraded mode (no routing LLM, no answer
+    synthesis, cache-only direct answers), and rejected outright once the
+    in-flight limit is reached.
+
+    Degraded requests make no upstream calls, so they add no new latency
+    samples; observations older than `latency_max_age` are ignored so a
+    past spike stops counting and normal requests probe the upstream again.
+    """
+
+    # Timings (recorded by the LLM service and router) that reflect upstream health
+    STAGE_PREFIXES: Tuple[str, ...] = ("llm.", "tool.")
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        degrade_in_flight: int = 32,
+        degrade_latency_ms: float = 10000,
+        retry_after: int = 5,
+        latency_window: int = 50,
+        latency_max_age: float = 60
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            max_in_flight: Reject requests beyond this many in flight
+            degrade_in_flight: Degrade requests beyond this many in flight
+            degrade_latency_ms: Degrade when the p90 of any recent stage latency exceeds this
+            retry_after: Seconds clients are asked to wait before retrying
+            latency_window: Number of recent observations per stage to consider
+            latency_max_age: Ignore observations older than this many seconds
+        """
+        self.max_in_flight = max_in_flight
+        self.degrade_in_flight = degrade_in_flight
+        self.degrade_latency_ms = degrade_latency_ms
+        self.retry_after = retry_after
+        self.latency_window = latency_window
+        self.latency_max_age = latency_max_age
+        self.in_flight = 0
+        self.admitted = 0  # Total admitted and degraded requests, for telling which requests overlapped
+        self._latency: Optional[float] = None
+        self._latency_checked_at = 0.0
+
+    def stage_latency_ms(self) -> float:
+        """
+        Get the worst p90 latency across upstream stages, recomputed at most once a second.
+
+        Returns:
+            Latency in milliseconds (0.0 if nothing has been recorded)
+        """
+        now = time.monotonic()
+        if self._latency is not None and now - self._latency_checked_at < 1.0:
+            return self._latency
+
+        worst = 0.0
+        for name in list(metrics.timings):
+            if not name.startswith(self.STAGE_PREFIXES):
+                continue
+            values = sorted(metrics.recent(name, self.latency_window, max_age=self.latency_max_age))
+            if values:
+                worst = max(worst, values[int(0.9 * (len(values) - 1))])
+
+        self._latency = worst
+        self._latency_checked_at = now
+        return worst
+
+    def admit(self) -> str:
+        """
+        Decide how to handle a new request; admitted and degraded requests
+        must be paired with `release`.
+
+        Returns:
+            ADMIT, DEGRADE or REJECT
+        """
+        if self.in_flight >= self.max_in_flight:
+            decision = REJECT
+        elif self.in_flight >= self.degrade_in_flight or self.stage_latency_ms() > self.degrade_latency_ms:
+            decision = DEGRADE
+        else:
+            decision = ADMIT
+
+        metrics.increment(f"admission.{decision}")
+        if decision != REJECT:
+            self.in_flight += 1
+            self.admitted += 1
+            metrics.set_gauge("admission.in_flight", self.in_flight)
+        return decision
+
+    def release(self) -> None:
+        """Mark an admitted request as finished."""
+        self.in_flight -= 1
+        metrics.set_gauge("admission.in_flight", self.in_flight)
+
+# Create a global admission controller
+admission = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    degrade_in_flight=settings.ADMISSION_DEGRADE_IN_FLIGHT,
+    degrade_latency_ms=settings.ADMISSION_DEGRADE_LATENCY_MS,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+    latency_max_age=settings.ADMISSION_LATENCY_MAX_AGE
+)
@@ -1,20 +1,33 @@
+import os
 import time
 from typing import Dict, Any, Optional, Tuple
 import hashlib
 import json
+from config import settings
+from app.shared_cache import SharedCache, Version, VERSION
 
 class SimpleCache:
-    """A simple in-memory cache with time-based expiration."""
+    """
+    A simple in-memory cache with time-based expiration.
     
-    def __init__(self, default_ttl: int = 300):
+    With a `SharedCache` as second tier, entries written by any process on
+    the host are found on a local miss and copied into this process. Local
+    copies of shared entries remember the shared entry's version and are
+    dropped once another process overwrites, deletes or clears it.
+    """
+    
+    def __init__(self, default_ttl: int = 300, shared: Optional[SharedCache] = None):
         """
         Initialize the cache.
         
         Args:
             default_ttl: Default time-to-live in seconds (5 minutes)
+            shared: Optional cross-process tier consulted on local misses
         """
         self.cache: Dict[str, Tuple[Any, float]] = {}
         self.default_ttl = default_ttl
+        self.shared = shared
+        self.versions: Dict[str, Version] = {}  # Shared-tier version of each local copy
     
     def _get_key(self, data: Any) -> str:
         """Generate a cache key from the data."""
@@ -40,18 +53,47 @@ class SimpleCache:
         if key in self.cache:
             value, expiry = self.cache[key]
             
-            # Check if the entry has expired
-            if time.time() < expiry:
+            # Check if the entry has expired or been replaced by another process
+            if time.time() < expiry and self._is_current(key):
                 print(f"Cache hit for key: {key}")
                 return value
             
             # Remove expired entry
             print(f"Cache expired for key: {key}")
-            del self.cache[key]
+            self._drop(key)
+        
+        entry = self._get_shared(key)
+        if entry is not None:
+            print(f"Shared cache hit for key: {key}")
+            return entry[0]
         
         print(f"Cache miss for key: {key}")
         return None
     
+    def _is_current(self, key: str) -> bool:
+        """Check that a local copy of a shared entry hasn't been replaced in the shared tier."""
+        version = self.versions.get(key)
+        return version is None or self.shared.is_current(version)
+    
+    def _drop(self, key: str) -> None:
+        """Remove a local entry."""
+        self.cache.pop(key, None)
+        self.versions.pop(key, None)
+    
+    def _get_shared(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Look a key up in the shared tier, replacing the local entry with the result."""
+        if self.shared is None:
+            return None
+        
+        entry = self.shared.lookup(key)
+        if entry is None:
+            self._drop(key)
+            return None
+        
+        self.cache[key] = entry[:2]
+        self.versions[key] = entry[2]
+        return entry[:2]
+    
     def set(self, key_data: Any, value: Any, ttl: Optional[int] = None) -> None:
         """
         Set a value in the cache.
@@ -64,11 +106,70 @@ class SimpleCache:
         key = self._get_key(key_data)
         expiry = time.time() + (ttl if ttl is not None else self.default_ttl)
         self.cache[key] = (value, expiry)
+        self.versions.pop(key, None)
+        if self.shared is not None:
+            version = self.shared.set(key, value, expiry)
+            if version is None:
+                print(f"Value for key {key} is too large for the shared cache")
+            else:
+                self.versions[key] = version
         print(f"Cached value for key: {key}, expires in {ttl if ttl is not None else self.default_ttl}s")
     
+    def peek(self, key_data: Any) -> Optional[Any]:
+        """
+        Get a value without logging or counting a hit or miss.
+        
+        Args:
+            key_data: Data to generate the key from
+            
+        Returns:
+            The cached value or None if not found or expired
+        """
+        key = self._get_key(key_data)
+        entry = self.cache.get(key)
+        if entry is None or time.time() >= entry[1] or not self._is_current(key):
+            entry = self._get_shared(key)
+        return entry[0] if entry is not None else None
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of entries and their approximate size.
+        
+        Returns:
+            Entry count and estimated bytes (keys plus JSON-encoded values)
+        """
+        approx_bytes = 0
+        for key, (value, _) in self.cache.items():
+            serialized = value if isinstance(value, str) else json.dumps(value, default=str)
+            approx_bytes += len(key) + len(serialized.encode('utf-8'))
+        return {"entries": len(self.cache), "approx_bytes": approx_bytes}
+    
+    def ttl_remaining(self, key_data: Any) -> Optional[float]:
+        """
+        Get the seconds left before an entry expires, without counting a hit or miss.
+        
+        Args:
+            key_data: Data to generate the key from
+            
+        Returns:
+            Seconds until expiry, or None if the entry is missing or expired
+        """
+        key = self._get_key(key_data)
+        entry = self.cache.get(key)
+        if entry is None or time.time() >= entry[1] or not self._is_current(key):
+            entry = self._get_shared(key)
+        if entry is None:
+            return None
+        
+        remaining = entry[1] - time.time()
+        return remaining if remaining > 0 else None
+    
     def clear(self) -> None:
-        """Clear all cache entries."""
+        """Clear all cache entries (in every process, when there is a shared tier)."""
         self.cache.clear()
+        self.versions.clear()
+        if self.shared is not None:
+            self.shared.clear()
         print("Cache cleared")
     
     def remove_expired(self) -> int:
@@ -82,13 +183,30 @@ class SimpleCache:
         expired_keys = [k for k, (_, exp) in self.cache.items() if now > exp]
         
         for key in expired_keys:
-            del self.cache[key]
+            self._drop(key)
         
         if expired_keys:
             print(f"Removed {len(expired_keys)} expired cache entries")
         
         return len(expired_keys)
 
+def shared_tier(name: str) -> Optional[SharedCache]:
+    """
+    Open the cross-process tier for a cache, if enabled.
+    
+    The file name includes the format version and layout, so workers started
+    with different SHARED_CACHE_SLOTS or SHARED_CACHE_SLOT_BYTES (e.g. during
+    a rolling restart) use separate files instead of resizing a mapped one.
+    """
+    if not settings.SHARED_CACHE_ENABLED:
+        return None
+    slots, slot_size = settings.SHARED_CACHE_SLOTS, settings.SHARED_CACHE_SLOT_BYTES
+    return SharedCache(
+        os.path.join(settings.SHARED_CACHE_DIR, f"askwiseai-{name}-v{VERSION}-{slots}x{slot_size}.cache"),
+        slots=slots,
+        slot_size=slot_size
+    )
+
 # Create cache instances
-llm_cache = SimpleCache(default_ttl=3600)  # 1 hour for LLM responses
-tool_cache = SimpleCache(default_ttl=300)  # 5 minutes for tool responses 
\ No newline at end of file
+llm_cache = SimpleCache(default_ttl=3600, shared=shared_tier("llm"))  # 1 hour for LLM responses
+tool_cache = SimpleCache(default_ttl=300, shared=shared_tier("tool"))  # 5 minutes for tool responses 
\ No newline at end of file
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget has run out."""
+    pass
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before the response was ready."""
+    pass
+
+class Deadline:
+    """End-to-end time budget for a request, shared by every hop it makes."""
+
+    def __init__(self, seconds: float):
+        """
+        Initialize the deadline.
+
+        Args:
+            seconds: Time budget from now
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left in the budget (never negative)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, cap: float) -> float:
+        """
+        Get the timeout for the next hop.
+
+        Args:
+            cap: The hop's own maximum timeout
+
+        Returns:
+            The smaller of `cap` and the remaining budget
+
+        Raises:
+            DeadlineExceeded: If the budget has already run out
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded("Request deadline exceeded")
+        return min(cap, remaining)
+
+def hop_timeout(deadline: Optional[Deadline], cap: float) -> float:
+    """Get a hop's timeout, falling back to `cap` when there is no deadline."""
+    return deadline.timeout(cap) if deadline is not None else cap
+
+async def run_with_deadline(
+    work: Awaitable[Any],
+    deadline: Deadline,
+    is_disconnected: Optional[Callable[[], Awaitable[bool]]] = None,
+    poll_interval: float = 0.5
+) -> Any:
+    """
+    Run request work within its deadline, cancelling it if the client disconnects.
+
+    Args:
+        work: The request's coroutine
+        deadline: The request deadline
+        is_disconnected: Optional check for a client disconnect (e.g. `Request.is_disconnected`)
+        poll_interval: Seconds between disconnect checks
+
+    Returns:
+        The result of `work`
+
+    Raises:
+        DeadlineExceeded: If the work didn't finish in time (it is cancelled)
+        ClientDisconnected: If the client went away first (the work is cancelled)
+    """
+    task = asyncio.ensure_future(work)
+    disconnected = False
+
+    async def watch() -> None:
+        nonlocal disconnected
+        while not task.done():
+            if await is_disconnected():
+                disconnected = True
+                task.cancel()
+                return
+            await asyncio.sleep(poll_interval)
+
+    watcher = asyncio.ensure_future(watch()) if is_disconnected is not None else None
+    try:
+        return await asyncio.wait_for(task, timeout=deadline.remaining())
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded("Request deadline exceeded")
+    except asyncio.CancelledError:
+        if disconnected:
+            raise ClientDisconnected("Client disconnected")
+        raise
+    finally:
+        if watcher is not None:
+            watcher.cancel()
@@ -0,0 +1,157 @@
+import os
+from array import array
+from typing import Dict, Any, List, Optional, Set
+from app.utils.text_index import SortedKeyIndex, normalize_text
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(__file__), "data", "gazetteer.tsv")
+
+# Extra qualifiers people use for a country, keyed by country code
+COUNTRY_QUALIFIERS = {
+    "US": ["usa", "u s", "u s a", "america", "united states of america"],
+    "GB": ["uk", "u k", "britain", "great britain", "england"],
+    "AE": ["uae"],
+    "KR": ["korea"],
+    "CZ": ["czechia"],
+    "NL": ["holland"]
+}
+
+# US state abbreviations for "Portland, OR" style qualifiers
+US_STATE_CODES = {
+    "Alaska": "ak", "Arizona": "az", "California": "ca", "Colorado": "co",
+    "District of Columbia": "dc", "Florida": "fl", "Georgia": "ga", "Hawaii": "hi",
+    "Illinois": "il", "Louisiana": "la", "Maine": "me", "Massachusetts": "ma",
+    "Michigan": "mi", "Minnesota": "mn", "Nevada": "nv", "New York": "ny",
+    "Ohio": "oh", "Oregon": "or", "Pennsylvania": "pa", "Tennessee": "tn",
+    "Texas": "tx", "Utah": "ut", "Washington": "wa"
+}
+
+class Gazetteer:
+    """
+    Offline index mapping free-text place names to canonical places.
+
+    Places are loaded from a bundled TSV into parallel arrays; names and
+    aliases go into a `SortedKeyIndex` so "NYC", "new york" and
+    "New York, US" all resolve to the same place ID without a network call.
+    Ambiguous names resolve to the most populous match unless a qualifier
+    (state, country or country code) picks another one.
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        """
+        Load the gazetteer.
+
+        Args:
+            path: TSV with id, name, admin, country, country_code, lat, lon,
+                population and pipe-separated aliases columns
+        """
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.admins: List[str] = []
+        self.countries: List[str] = []
+        self.country_codes: List[str] = []
+        self.lats = array("d")
+        self.lons = array("d")
+        self.populations = array("Q")
+        self.qualifiers: List[Set[str]] = []
+        self.positions: Dict[str, int] = {}
+
+        keys = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                place_id, name, admin, country, code, lat, lon, population, aliases = line.rstrip("\n").split("\t")
+
+                position = len(self.ids)
+                self.positions[place_id] = position
+                self.ids.append(place_id)
+                self.names.append(name)
+                self.admins.append(admin)
+                self.countries.append(country)
+                self.country_codes.append(code)
+                self.lats.append(float(lat))
+                self.lons.append(float(lon))
+                self.populations.append(int(population))
+
+                qualifiers = {normalize_text(admin), normalize_text(country), code.lower()}
+                qualifiers.update(COUNTRY_QUALIFIERS.get(code, []))
+                if code == "US" and admin in US_STATE_CODES:
+                    qualifiers.add(US_STATE_CODES[admin])
+                self.qualifiers.append(qualifiers)
+
+                for alias in [name] + [a for a in aliases.split("|") if a]:
+                    keys.append((normalize_text(alias), position))
+
+        self.index = SortedKeyIndex(keys)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, place_id: str) -> Optional[Dict[str, Any]]:
+        """Get a place by its canonical ID, or None if the ID is unknown."""
+        position = self.positions.get(place_id)
+        return self._place(position) if position is not None else None
+
+    def resolve(self, text: str) -> Optional[Dict[str, Any]]:
+        """
+        Resolve a free-text location to a canonical place.
+
+        Tries, in order: the whole text as a name or alias; "name, qualifier"
+        and "name qualifier" splits where the qualifier matches the place's
+        state, country or country code; and a prefix of a single place's
+        name (at least four characters).
+
+        Args:
+            text: The location as the user or LLM wrote it
+
+        Returns:
+            The place, or None if it isn't in the gazetteer
+        """
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        position = self._best(self.index.exact(normalized))
+        if position is not None:
+            return self._place(position)
+
+        # "Portland, OR" / "London UK": try every split point from the right
+        words = normalized.split()
+        for i in range(len(words) - 1, 0, -1):
+            head, qualifier = " ".join(words[:i]), " ".join(words[i:])
+            candidates = [p for p in self.index.exact(head) if qualifier in self.qualifiers[p]]
+            position = self._best(candidates)
+            if position is not None:
+                return self._place(position)
+
+        if len(normalized) >= 4:
+            candidates = self.index.prefix(normalized, limit=2)
+            if len(candidates) == 1:
+                return self._place(candidates[0])
+
+        return None
+
+    def suggest(self, prefix: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Get places whose name or alias starts with `prefix`, most populous first."""
+        positions = self.index.prefix(normalize_text(prefix), limit=limit * 4)
+        positions.sort(key=lambda p: self.populations[p], reverse=True)
+        return [self._place(p) for p in positions[:limit]]
+
+    def _best(self, positions: List[int]) -> Optional[int]:
+        if not positions:
+            return None
+        return max(positions, key=lambda p: self.populations[p])
+
+    def _place(self, position: int) -> Dict[str, Any]:
+        return {
+            "id": self.ids[position],
+            "name": self.names[position],
+            "admin": self.admins[position],
+            "country": self.countries[position],
+            "country_code": self.country_codes[position],
+            "lat": self.lats[position],
+            "lon": self.lons[position]
+        }
+
+# Create a global gazetteer from the bundled data
+gazetteer = Gazetteer()
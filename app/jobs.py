@@ -0,0 +1,210 @@
+import asyncio
+import itertools
+import time
+import uuid
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from config import settings
+from app.metrics import metrics
+
+# Priority classes, lower value runs first
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+    pass
+
+class JobQueue:
+    """In-process job queue served by a pool of asyncio workers."""
+
+    def __init__(self, workers: int = 4, result_ttl: int = 600, max_queue_size: int = 1000, max_age: int = 1800):
+        """
+        Initialize the job queue.
+
+        Args:
+            workers: Number of concurrent workers
+            result_ttl: Seconds to keep a finished job's result
+            max_queue_size: Maximum number of queued (not yet running) jobs
+            max_age: Seconds after submission a queued or running job is marked failed
+        """
+        self.jobs: Dict[str, Dict[str, Any]] = {}
+        self.num_workers = workers
+        self.result_ttl = result_ttl
+        self.max_queue_size = max_queue_size
+        self.max_age = max_age
+        self.queue: Optional[asyncio.PriorityQueue] = None
+        self.handler: Optional[Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]] = None
+        self._workers: List[asyncio.Task] = []
+        self._sequence = itertools.count()  # Keeps FIFO order within a priority class
+        self._depth = {priority: 0 for priority in PRIORITIES}
+        self._running = 0
+
+    def start(self, handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> None:
+        """
+        Start the worker pool.
+
+        Args:
+            handler: Coroutine that runs a job and returns its result
+        """
+        self.handler = handler
+        # Capacity is enforced on the queued count, so abandoned jobs free their slot
+        self.queue = asyncio.PriorityQueue()
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.num_workers)]
+
+    async def stop(self) -> None:
+        """Stop the worker pool; queued jobs are not run."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, query: str, conversation_id: Optional[str] = None, priority: str = "normal") -> Dict[str, Any]:
+        """
+        Queue a query.
+
+        Args:
+            query: The user's query
+            conversation_id: Optional conversation to continue
+            priority: One of high, normal or low
+
+        Returns:
+            The job record
+        """
+        if self.queue is None:
+            raise RuntimeError("Job queue is not running")
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+
+        self.clean_expired()
+
+        now = time.time()
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "status": "queued",
+            "priority": priority,
+            "query": query,
+            "conversation_id": conversation_id,
+            "submitted_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "expires_at": None,
+            "result": None,
+            "error": None
+        }
+
+        if sum(self._depth.values()) >= self.max_queue_size:
+            metrics.increment("jobs.rejected")
+            raise JobQueueFull(f"Job queue is full ({self.max_queue_size} jobs)")
+
+        self.queue.put_nowait((PRIORITIES[priority], next(self._sequence), job["job_id"]))
+        self.jobs[job["job_id"]] = job
+        self._depth[priority] += 1
+        self._update_gauges()
+        metrics.increment(f"jobs.submitted.{priority}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job record, or None if it doesn't exist or has expired."""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+
+        if job["expires_at"] is not None and time.time() > job["expires_at"]:
+            del self.jobs[job_id]
+            return None
+        return job
+
+    def depth(self) -> Dict[str, int]:
+        """Get the number of queued jobs per priority class."""
+        return dict(self._depth)
+
+    def clean_expired(self) -> int:
+        """
+        Remove finished jobs whose results have passed their TTL.
+
+        Queued or running jobs older than `max_age` (e.g. left behind by a
+        crashed worker) are marked failed first, freeing their queue slot;
+        their records then expire like any other finished job.
+
+        Returns:
+            Number of jobs removed
+        """
+        now = time.time()
+        for job in self.jobs.values():
+            if job["status"] in ("queued", "running") and now - job["submitted_at"] > self.max_age:
+                self._abandon(job, now)
+
+        expired_ids = [
+            job_id for job_id, job in self.jobs.items()
+            if job["expires_at"] is not None and now > job["expires_at"]
+        ]
+
+        for job_id in expired_ids:
+            del self.jobs[job_id]
+
+        return len(expired_ids)
+
+    def _abandon(self, job: Dict[str, Any], now: float) -> None:
+        """Mark a job that has been queued or running for too long as failed."""
+        if job["status"] == "queued":
+            self._depth[job["priority"]] -= 1
+        else:
+            self._running -= 1
+        self._update_gauges()
+
+        job["status"] = "failed"
+        job["error"] = f"Job did not finish within {self.max_age} seconds"
+        job["finished_at"] = now
+        job["expires_at"] = now + self.result_ttl
+        metrics.increment("jobs.abandoned")
+
+    def _update_gauges(self) -> None:
+        for priority, depth in self._depth.items():
+            metrics.set_gauge(f"jobs.queue_depth.{priority}", depth)
+        metrics.set_gauge("jobs.queue_depth", sum(self._depth.values()))
+        metrics.set_gauge("jobs.running", self._running)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, job_id = await self.queue.get()
+            job = self.jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                continue  # Expired or abandoned while queued
+
+            self._depth[job["priority"]] -= 1
+            self._running += 1
+            self._update_gauges()
+
+            job["status"] = "running"
+            job["started_at"] = time.time()
+            metrics.observe(f"jobs.wait_ms.{job['priority']}", (job["started_at"] - job["submitted_at"]) * 1000)
+
+            status, result, error = "failed", None, "Job was interrupted"
+            try:
+                result = await self.handler(job)
+                status, error = "succeeded", None
+            except asyncio.CancelledError:
+                error = "Job was cancelled"
+                raise
+            except Exception as e:
+                print(f"Job {job_id} failed: {str(e)}")
+                error = str(e)
+            finally:
+                # A job abandoned by clean_expired while it ran keeps that outcome
+                if job["status"] == "running":
+                    job["status"] = status
+                    job["result"] = result
+                    job["error"] = error
+                    job["finished_at"] = time.time()
+                    job["expires_at"] = job["finished_at"] + self.result_ttl
+                    self._running -= 1
+                    self._update_gauges()
+                    metrics.increment(f"jobs.{job['status']}")
+                    metrics.observe("jobs.run_ms", (job["finished_at"] - job["started_at"]) * 1000)
+
+# Create a global job queue
+job_queue = JobQueue(
+    workers=settings.JOB_WORKERS,
+    result_ttl=settings.JOB_RESULT_TTL,
+    max_queue_size=settings.JOB_MAX_QUEUE_SIZE,
+    max_age=settings.JOB_MAX_AGE
+)
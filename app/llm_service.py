@@ -1,16 +1,92 @@
 import os
 import json
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, Callable, Awaitable, Tuple
 import httpx
 from config import settings
 from app.cache import llm_cache
+from app.deadline import Deadline, hop_timeout
+from app.metrics import metrics
+
+class LLMCacheMiss(Exception):
+    """Raised when a cache-only request has no cached response."""
+    pass
+
+def estimate_cost(model: str, usage: Dict[str, Any]) -> float:
+    """
+    Estimate the cost of a completion in USD.
+    
+    Args:
+        model: The model that served the request
+        usage: The `usage` block from the API response
+        
+    Returns:
+        Estimated cost, or 0.0 if the model has no configured price
+    """
+    prices = settings.MODEL_COSTS.get(model)
+    if not prices:
+        return 0.0
+    
+    return (
+        usage.get("prompt_tokens", 0) / 1000 * prices.get("prompt", 0.0)
+        + usage.get("completion_tokens", 0) / 1000 * prices.get("completion", 0.0)
+    )
+
+async def _stream_completion(
+    client: httpx.AsyncClient,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    on_token: Callable[[str], Awaitable[None]],
+    timeout: float
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Stream a chat completion, passing each content delta to `on_token`.
+    
+    Returns:
+        The full content and the usage block (empty if the API didn't send one)
+    """
+    payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+    content = ""
+    usage: Dict[str, Any] = {}
+    
+    async with client.stream(
+        "POST",
+        "https://api.openai.com/v1/chat/completions",
+        headers=headers,
+        json=payload,
+        timeout=timeout
+    ) as response:
+        if response.status_code != 200:
+            raise Exception(f"LLM API error: {(await response.aread()).decode('utf-8', 'replace')}")
+        
+        # Server-sent events: one "data: {...}" line per chunk, ending with "data: [DONE]"
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            data = line[len("data: "):]
+            if data == "[DONE]":
+                break
+            
+            chunk = json.loads(data)
+            usage = chunk.get("usage") or usage
+            for choice in chunk.get("choices", []):
+                delta = choice.get("delta", {}).get("content")
+                if delta:
+                    content += delta
+                    await on_token(delta)
+    
+    return content, usage
 
 async def get_llm_response(
     prompt: str, 
     model: str = settings.DEFAULT_MODEL,
     temperature: float = 0.7,
     response_format: Optional[Dict[str, Any]] = None,
-    use_cache: bool = True
+    use_cache: bool = True,
+    stage: str = "default",
+    on_token: Optional[Callable[[str], Awaitable[None]]] = None,
+    cache_only: bool = False,
+    deadline: Optional[Deadline] = None
 ) -> str:
     """
     Get a response from the LLM.
@@ -21,10 +97,16 @@ async def get_llm_response(
         temperature: The temperature parameter for generation
         response_format: Optional format specification (for JSON responses)
         use_cache: Whether to use caching
+        stage: Pipeline stage making the call (routing, synthesis, ...), used for accounting
+        on_token: Optional callback to stream text responses as they are generated
+        cache_only: Raise LLMCacheMiss instead of calling the API on a cache miss
+        deadline: Optional request deadline; the API timeout is capped by its remaining budget
         
     Returns:
         The LLM's response as a string
     """
+    metrics.increment(f"llm.{stage}.calls")
+    
     # Create a cache key from the request parameters
     if use_cache:
         cache_key = {
@@ -37,8 +119,14 @@ async def get_llm_response(
         # Check cache first
         cached_response = llm_cache.get(cache_key)
         if cached_response is not None:
+            metrics.increment(f"llm.{stage}.cache_hits")
+            if on_token is not None and isinstance(cached_response, str):
+                await on_token(cached_response)
             return cached_response
     
+    if cache_only:
+        raise LLMCacheMiss(f"No cached {stage} response for model {model}")
+    
     # This example uses OpenAI's API, but could be adapted for other providers
     api_key = settings.OPENAI_API_KEY
     
@@ -56,19 +144,37 @@ async def get_llm_response(
     if response_format:
         payload["response_format"] = response_format
     
+    timeout = hop_timeout(deadline, 30.0)
+    
     async with httpx.AsyncClient() as client:
-        response = await client.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            json=payload,
-            timeout=30.0
-        )
-        
-        if response.status_code != 200:
-            raise Exception(f"LLM API error: {response.text}")
+        start = time.perf_counter()
+        if on_token is not None and not response_format:
+            try:
+                content, usage = await _stream_completion(client, headers, payload, on_token, timeout)
+            except Exception:
+                metrics.increment(f"llm.{stage}.errors")
+                raise
+        else:
+            response = await client.post(
+                "https://api.openai.com/v1/chat/completions",
+                headers=headers,
+                json=payload,
+                timeout=timeout
+            )
+            
+            if response.status_code != 200:
+                metrics.increment(f"llm.{stage}.errors")
+                raise Exception(f"LLM API error: {response.text}")
+            
+            result = response.json()
+            content = result["choices"][0]["message"]["content"]
+            usage = result.get("usage") or {}
+        metrics.observe(f"llm.{stage}.{model}_ms", (time.perf_counter() - start) * 1000)
         
-        result = response.json()
-        content = result["choices"][0]["message"]["content"]
+        # Per-stage token and cost accounting
+        metrics.increment(f"llm.{stage}.{model}.prompt_tokens", usage.get("prompt_tokens", 0))
+        metrics.increment(f"llm.{stage}.{model}.completion_tokens", usage.get("completion_tokens", 0))
+        metrics.increment(f"llm.{stage}.{model}.cost_usd", estimate_cost(model, usage))
         
         # If expecting JSON, parse it
         if response_format and response_format.get("type") == "json_object":
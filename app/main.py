@@ -1,16 +1,39 @@
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi import FastAPI, HTTPException, Depends, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Literal
+from contextlib import asynccontextmanager
 import uvicorn
+import json
 import time
 
-from app.router import route_query
+from app.router import route_query, DegradedResponseUnavailable
+from app.admission import admission, REJECT, DEGRADE
+from app.deadline import Deadline, DeadlineExceeded, ClientDisconnected, run_with_deadline
 from app.llm_service import get_llm_response
 from app.memory import conversation_memory
 from app.cache import llm_cache, tool_cache
+from app.jobs import job_queue, JobQueueFull
+from app.metrics import metrics
+from app.profiling import profiler
+from app.session import ConversationSession
+from app.warmer import cache_warmer
 from app.utils.logging import logger
+from config import settings
 
-app = FastAPI(title="AskWiseAI - AI Q&A System")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMER_ENABLED:
+        cache_warmer.start(settings.WARMER_INTERVAL)
+        logger.info("Started cache warmer")
+    job_queue.start(run_job)
+    logger.info(f"Started {job_queue.num_workers} job workers")
+    yield
+    await job_queue.stop()
+    await cache_warmer.stop()
+
+app = FastAPI(title="AskWiseAI - AI Q&A System", lifespan=lifespan)
 
 class QueryRequest(BaseModel):
     query: str
@@ -23,67 +46,227 @@ class QueryResponse(BaseModel):
     tool_input: Optional[Dict[str, Any]] = None
     tool_output: Optional[Dict[str, Any]] = None
 
+class JobRequest(BaseModel):
+    query: str
+    conversation_id: Optional[str] = None
+    priority: Literal["high", "normal", "low"] = "normal"
+
+class ProfilingSettings(BaseModel):
+    sample_rate: float = Field(ge=0, le=1)
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str
+    priority: str
+    submitted_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+async def answer_query(
+    query: str,
+    conversation_id: Optional[str] = None,
+    degraded: bool = False,
+    deadline: Optional[Deadline] = None
+) -> QueryResponse:
+    """
+    Run one conversation turn: record the query, route it and record the answer.
+    
+    Args:
+        query: The user's query
+        conversation_id: Conversation to continue (a new one is created if missing)
+        degraded: Answer without routing/synthesis LLM calls (under overload)
+        deadline: Optional time budget shared by every LLM and tool call
+        
+    Returns:
+        The response for the turn
+    """
+    logger.info(f"Received query: {query}")
+    
+    # Get or create conversation ID
+    if not conversation_id or conversation_id not in conversation_memory.conversations:
+        conversation_id = conversation_memory.create_conversation()
+        logger.info(f"Created new conversation: {conversation_id}")
+    else:
+        logger.info(f"Using existing conversation: {conversation_id}")
+    
+    # Add user message to conversation history
+    conversation_memory.add_message(
+        conversation_id=conversation_id,
+        role="user",
+        content=query
+    )
+    
+    # Get conversation context
+    context = conversation_memory.get_conversation_context(conversation_id, max_turns=3)
+    
+    # Route the query to either LLM or a tool, with conversation context
+    logger.info(f"Routing query with context length: {len(context) if context else 0}")
+    result = await route_query(
+        query, context=context if context else None, degraded=degraded, deadline=deadline
+    )
+    
+    # Log tool usage if applicable
+    if "tool_used" in result:
+        logger.info(f"Used tool: {result['tool_used']}")
+    
+    # Add assistant response to conversation history
+    conversation_memory.add_message(
+        conversation_id=conversation_id,
+        role="assistant",
+        content=result["response"],
+        metadata={
+            "tool_used": result.get("tool_used"),
+            "tool_input": result.get("tool_input"),
+            "tool_output": result.get("tool_output"),
+            "tool_cache_key": result.get("tool_cache_key")
+        }
+    )
+    
+    logger.info(f"Returning response for query: {query[:30]}...")
+    
+    return QueryResponse(
+        response=result["response"],
+        conversation_id=conversation_id,
+        tool_used=result.get("tool_used"),
+        tool_input=result.get("tool_input"),
+        tool_output=result.get("tool_output")
+    )
+
 @app.post("/query", response_model=QueryResponse)
-async def process_query(request: QueryRequest):
+async def process_query(request: QueryRequest, http_request: Request, response: Response):
+    deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
+    decision = admission.admit() if settings.ADMISSION_ENABLED else None
+    retry_after = {"Retry-After": str(admission.retry_after)}
+    if decision == REJECT:
+        logger.warning(f"Rejected query: {admission.in_flight} requests in flight")
+        raise HTTPException(status_code=429, detail="Server is overloaded, please retry later", headers=retry_after)
+    
+    # Profile on request (X-Profile: 1) or when sampled
+    profile_requested = http_request.headers.get("X-Profile", "").lower() in ("1", "true")
     try:
-        logger.info(f"Received query: {request.query}")
-        
-        # Get or create conversation ID
-        conversation_id = request.conversation_id
-        if not conversation_id or conversation_id not in conversation_memory.conversations:
-            conversation_id = conversation_memory.create_conversation()
-            logger.info(f"Created new conversation: {conversation_id}")
-        else:
-            logger.info(f"Using existing conversation: {conversation_id}")
-        
-        # Add user message to conversation history
-        conversation_memory.add_message(
-            conversation_id=conversation_id,
-            role="user",
-            content=request.query
-        )
-        
-        # Get conversation context
-        context = conversation_memory.get_conversation_context(conversation_id, max_turns=3)
-        
-        # Route the query to either LLM or a tool, with conversation context
-        logger.info(f"Routing query with context length: {len(context) if context else 0}")
-        result = await route_query(request.query, context=context if context else None)
-        
-        # Log tool usage if applicable
-        if "tool_used" in result:
-            logger.info(f"Used tool: {result['tool_used']}")
-        
-        # Add assistant response to conversation history
-        conversation_memory.add_message(
-            conversation_id=conversation_id,
-            role="assistant",
-            content=result["response"],
-            metadata={
-                "tool_used": result.get("tool_used"),
-                "tool_input": result.get("tool_input"),
-                "tool_output": result.get("tool_output")
-            }
-        )
-        
-        logger.info(f"Returning response for query: {request.query[:30]}...")
-        
-        return QueryResponse(
-            response=result["response"],
-            conversation_id=conversation_id,
-            tool_used=result.get("tool_used"),
-            tool_input=result.get("tool_input"),
-            tool_output=result.get("tool_output")
-        )
+        with profiler.profile(f"POST /query: {request.query[:50]}", requested=profile_requested) as profile_id:
+            if profile_id is not None:
+                logger.info(f"Profiling query as {profile_id}")
+                response.headers["X-Profile-Id"] = profile_id
+            return await run_with_deadline(
+                answer_query(request.query, request.conversation_id, degraded=decision == DEGRADE, deadline=deadline),
+                deadline,
+                is_disconnected=http_request.is_disconnected
+            )
+    except DeadlineExceeded:
+        logger.warning(f"Deadline exceeded for query: {request.query[:30]}...")
+        metrics.increment("requests.deadline_exceeded")
+        raise HTTPException(status_code=504, detail="Request deadline exceeded")
+    except ClientDisconnected:
+        # Nobody is waiting for the response; the in-flight work has been cancelled
+        logger.info(f"Client disconnected, cancelled query: {request.query[:30]}...")
+        metrics.increment("requests.client_disconnected")
+        raise HTTPException(status_code=499, detail="Client closed request")
+    except DegradedResponseUnavailable as e:
+        logger.warning(f"Shed degraded query: {str(e)}")
+        raise HTTPException(status_code=503, detail="Server is overloaded, please retry later", headers=retry_after)
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if decision is not None:
+            admission.release()
+
+async def run_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job queue handler: answer the job's query like POST /query would."""
+    deadline = Deadline(settings.JOB_DEADLINE_SECONDS)
+    response = await run_with_deadline(answer_query(job["query"], job["conversation_id"], deadline=deadline), deadline)
+    return response.model_dump()
+
+@app.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(request: JobRequest):
+    try:
+        job = job_queue.submit(request.query, request.conversation_id, request.priority)
+    except JobQueueFull as e:
+        logger.warning(str(e))
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    logger.info(f"Queued job {job['job_id']} with {request.priority} priority")
+    return JobStatus(**job)
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatus(**job)
+
+@app.get("/jobs/{job_id}/result", response_model=QueryResponse)
+async def get_job_result(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "succeeded":
+        # Not done yet: tell the client to keep polling
+        return JSONResponse(status_code=202, content=JobStatus(**job).model_dump())
+    
+    return QueryResponse(**job["result"])
+
+@app.websocket("/ws/conversation")
+async def conversation_socket(websocket: WebSocket, conversation_id: Optional[str] = None):
+    """
+    Bind a WebSocket session to one conversation.
+    
+    Client messages:
+        {"type": "query", "query": "...", "interrupt": false}  queue a turn
+            (with "interrupt": true the in-flight and queued turns are cancelled first)
+        {"type": "cancel"}  cancel the in-flight and queued turns
+    
+    Server events carry the turn number: queued, routing, tool_call, tool_result,
+    token, retry, answer, cancelled and error.
+    """
+    await websocket.accept()
+    
+    if not conversation_id or conversation_id not in conversation_memory.conversations:
+        conversation_id = conversation_memory.create_conversation()
+        logger.info(f"Created new conversation: {conversation_id}")
+    
+    session = ConversationSession(conversation_id, websocket.send_json)
+    session.start()
+    await websocket.send_json({"type": "session", "conversation_id": conversation_id})
+    
+    try:
+        while True:
+            frame = await websocket.receive()
+            if frame["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(frame.get("code", 1000))
+            
+            try:
+                message = json.loads(frame.get("text") or frame.get("bytes") or "")
+            except ValueError:
+                message = None
+            if not isinstance(message, dict):
+                # Keep the session open; the client can send a valid message next
+                await websocket.send_json({"type": "error", "detail": "Messages must be JSON objects"})
+                continue
+            
+            message_type = message.get("type", "query")
+            if message_type == "cancel":
+                await session.cancel()
+            elif message_type == "query" and isinstance(message.get("query"), str) and message["query"].strip():
+                await session.submit(message["query"], interrupt=bool(message.get("interrupt", False)))
+            else:
+                await websocket.send_json({"type": "error", "detail": f"Invalid message: {message}"})
+    except WebSocketDisconnect:
+        logger.info(f"WebSocket closed for conversation: {conversation_id}")
+    finally:
+        await session.close()
 
 @app.get("/health")
 async def health_check():
     # Clean expired conversations and cache entries
     expired_convs = conversation_memory.clean_expired_conversations()
     expired_cache = tool_cache.remove_expired() + llm_cache.remove_expired()
+    expired_jobs = job_queue.clean_expired()
     
     logger.info(f"Health check: {len(conversation_memory.conversations)} active conversations, "
                 f"{expired_convs} expired conversations removed, "
@@ -95,14 +278,69 @@ async def health_check():
         "stats": {
             "active_conversations": len(conversation_memory.conversations),
             "expired_conversations_removed": expired_convs,
-            "expired_cache_entries_removed": expired_cache
+            "expired_cache_entries_removed": expired_cache,
+            "expired_jobs_removed": expired_jobs,
+            "queued_jobs": job_queue.depth()
         }
     }
 
+@app.get("/metrics")
+async def get_metrics():
+    # Memory usage by component
+    for name, value in conversation_memory.stats().items():
+        metrics.set_gauge(f"memory.conversations.{name}", value)
+    for cache_name, cache in (("llm_cache", llm_cache), ("tool_cache", tool_cache)):
+        for name, value in cache.stats().items():
+            metrics.set_gauge(f"memory.{cache_name}.{name}", value)
+        if cache.shared is not None:
+            for name, value in cache.shared.stats().items():
+                metrics.set_gauge(f"memory.{cache_name}.shared.{name}", value)
+    
+    return metrics.snapshot()
+
+def require_profiling() -> None:
+    """Hide the profiling endpoints unless profiling is enabled."""
+    if not profiler.enabled:
+        raise HTTPException(status_code=404, detail="Profiling is disabled")
+
+@app.get("/admin/profiling", dependencies=[Depends(require_profiling)])
+async def get_profiling():
+    return {
+        "sample_rate": profiler.sample_rate,
+        "capacity": profiler.profiles.maxlen,
+        "profiles": profiler.list()
+    }
+
+@app.put("/admin/profiling", dependencies=[Depends(require_profiling)])
+async def update_profiling(request: ProfilingSettings):
+    profiler.sample_rate = request.sample_rate
+    logger.info(f"Set profile sample rate to {request.sample_rate}")
+    return {"sample_rate": profiler.sample_rate}
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_profiling)])
+async def download_profile(profile_id: str, format: Literal["speedscope", "pstats"] = "speedscope"):
+    if format == "pstats":
+        content = profiler.export_pstats(profile_id)
+        if content is None:
+            raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+        return Response(
+            content=content,
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+        )
+    
+    # Rebuilding the call tree is CPU-bound, keep it off the event loop
+    content = await run_in_threadpool(profiler.export_speedscope, profile_id)
+    if content is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return JSONResponse(
+        content=content,
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'}
+    )
+
 @app.delete("/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
-    if conversation_id in conversation_memory.conversations:
-        del conversation_memory.conversations[conversation_id]
+    if conversation_memory.delete_conversation(conversation_id):
         logger.info(f"Deleted conversation: {conversation_id}")
         return {"status": "success", "message": f"Conversation {conversation_id} deleted"}
     else:
@@ -1,21 +1,44 @@
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
+import json
 import time
 import uuid
+from config import settings
+from app.cache import tool_cache
+from app.metrics import metrics
+
+# Rough per-object overhead of the dicts, floats and strings we store, in bytes
+MESSAGE_OVERHEAD = 400
+CONVERSATION_OVERHEAD = 600
+
+def estimate_size(value: Any) -> int:
+    """Estimate the memory footprint of a JSON-like value in bytes."""
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(json.dumps(value, default=str).encode('utf-8'))
 
 class ConversationMemory:
     """Simple in-memory storage for conversation history."""
     
-    def __init__(self, max_history: int = 10, ttl: int = 3600):
+    def __init__(self, max_history: int = 10, ttl: int = 3600, budget_bytes: Optional[int] = None):
         """
         Initialize conversation memory.
         
         Args:
             max_history: Maximum number of turns to remember
             ttl: Time-to-live in seconds for conversations (default: 1 hour)
+            budget_bytes: Global memory budget; least recently active conversations
+                are evicted when it is exceeded (no limit if None)
         """
-        self.conversations: Dict[str, Dict[str, Any]] = {}
+        # Ordered from least to most recently active
+        self.conversations: Dict[str, Dict[str, Any]] = OrderedDict()
         self.max_history = max_history
         self.ttl = ttl
+        self.budget_bytes = budget_bytes
+        self.content_bytes = 0
+        self.metadata_bytes = 0
     
     def create_conversation(self) -> str:
         """
@@ -28,8 +51,10 @@ class ConversationMemory:
         self.conversations[conversation_id] = {
             "messages": [],
             "created_at": time.time(),
-            "last_updated": time.time()
+            "last_updated": time.time(),
+            "size": CONVERSATION_OVERHEAD
         }
+        self._enforce_budget(keep=conversation_id)
         return conversation_id
     
     def add_message(self, conversation_id: str, role: str, content: str, 
@@ -49,22 +74,153 @@ class ConversationMemory:
         if conversation_id not in self.conversations:
             return False
         
+        metadata = self._compact_metadata(metadata or {})
+        content_size = estimate_size(content)
+        metadata_size = estimate_size(metadata) if metadata else 0
+        
         # Update the conversation
         conversation = self.conversations[conversation_id]
-        conversation["messages"].append({
+        message = {
             "role": role,
             "content": content,
             "timestamp": time.time(),
-            "metadata": metadata or {}
-        })
+            "metadata": metadata,
+            "size": (content_size, metadata_size)
+        }
+        conversation["messages"].append(message)
+        self._account(conversation, message, 1)
         
         # Trim history if needed
         if len(conversation["messages"]) > self.max_history:
+            for old_message in conversation["messages"][:-self.max_history]:
+                self._account(conversation, old_message, -1)
             conversation["messages"] = conversation["messages"][-self.max_history:]
         
         conversation["last_updated"] = time.time()
+        self.conversations.move_to_end(conversation_id)
+        self._enforce_budget(keep=conversation_id)
+        return True
+    
+    def remove_last_message(self, conversation_id: str, role: str) -> bool:
+        """
+        Remove the most recent message if it was sent by `role` (e.g. an unanswered question).
+        
+        Args:
+            conversation_id: ID of the conversation
+            role: Role the last message must have
+            
+        Returns:
+            True if a message was removed
+        """
+        conversation = self.conversations.get(conversation_id)
+        if not conversation or not conversation["messages"] or conversation["messages"][-1]["role"] != role:
+            return False
+        
+        self._account(conversation, conversation["messages"].pop(), -1)
         return True
     
+    def _compact_metadata(self, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Share a tool output with its `tool_cache` entry when the cache holds
+        the same result, so it isn't held in memory twice.
+        
+        The message keeps the cache's object itself rather than a reference
+        to the key: tool results expire long before conversations do, and
+        the output has to outlive the cache entry. It is still counted in
+        full towards the memory budget for that reason.
+        """
+        cache_key = metadata.get("tool_cache_key")
+        output = metadata.get("tool_output")
+        compacted = {key: value for key, value in metadata.items() if key != "tool_cache_key"}
+        
+        if cache_key and output is not None:
+            cached = tool_cache.peek(cache_key)
+            if cached is not None and cached is not output and cached == output:
+                compacted["tool_output"] = cached
+                metrics.increment("memory.tool_outputs_deduplicated")
+        
+        return compacted
+    
+    def get_tool_output(self, message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Get the tool output stored with a message.
+        
+        Args:
+            message: A message returned by `get_messages`
+            
+        Returns:
+            The tool output, or None if the message has none
+        """
+        return message.get("metadata", {}).get("tool_output")
+    
+    def _account(self, conversation: Dict[str, Any], message: Dict[str, Any], sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) a message's bytes from the totals."""
+        content_size, metadata_size = message["size"]
+        conversation["size"] += sign * (content_size + metadata_size + MESSAGE_OVERHEAD)
+        self.content_bytes += sign * (content_size + MESSAGE_OVERHEAD)
+        self.metadata_bytes += sign * metadata_size
+    
+    @property
+    def total_bytes(self) -> int:
+        """Estimated bytes used by all conversations."""
+        return self.content_bytes + self.metadata_bytes + CONVERSATION_OVERHEAD * len(self.conversations)
+    
+    def _enforce_budget(self, keep: str) -> int:
+        """
+        Evict least recently active conversations until we're within budget.
+        
+        Args:
+            keep: Conversation that must not be evicted (the one being written)
+            
+        Returns:
+            Number of conversations evicted
+        """
+        if self.budget_bytes is None:
+            return 0
+        
+        evicted = 0
+        while self.total_bytes > self.budget_bytes and len(self.conversations) > 1:
+            oldest_id = next(iter(self.conversations))
+            if oldest_id == keep:
+                self.conversations.move_to_end(keep)
+                continue
+            self.delete_conversation(oldest_id)
+            evicted += 1
+        
+        if evicted:
+            metrics.increment("memory.conversations_evicted", evicted)
+            print(f"Evicted {evicted} conversations to stay within the memory budget")
+        return evicted
+    
+    def delete_conversation(self, conversation_id: str) -> bool:
+        """
+        Delete a conversation.
+        
+        Args:
+            conversation_id: ID of the conversation
+            
+        Returns:
+            True if the conversation existed
+        """
+        conversation = self.conversations.pop(conversation_id, None)
+        if conversation is None:
+            return False
+        
+        for message in conversation["messages"]:
+            self._account(conversation, message, -1)
+        return True
+    
+    def stats(self) -> Dict[str, int]:
+        """Get memory usage by component."""
+        return {
+            "conversations": len(self.conversations),
+            "messages": sum(len(c["messages"]) for c in self.conversations.values()),
+            "content_bytes": self.content_bytes,
+            "metadata_bytes": self.metadata_bytes,
+            "total_bytes": self.total_bytes,
+            "budget_bytes": self.budget_bytes or 0
+        }
+    
     def get_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
         """
         Get all messages for a conversation.
@@ -104,11 +260,25 @@ class ConversationMemory:
         # Format the conversation context
         context = "Previous conversation:\n"
         for msg in messages:
-            prefix = "User: " if msg["role"] == "user" else "Assistant: "
-            context += f"{prefix}{msg['content']}\n\n"
+            context += self.format_message(msg["role"], msg["content"])
         
         return context
     
+    @staticmethod
+    def format_message(role: str, content: str) -> str:
+        """
+        Render a single message the way it appears in the conversation context.
+        
+        Args:
+            role: Role of the message sender (user/assistant)
+            content: Message content
+            
+        Returns:
+            The rendered message
+        """
+        prefix = "User: " if role == "user" else "Assistant: "
+        return f"{prefix}{content}\n\n"
+    
     def clean_expired_conversations(self) -> int:
         """
         Remove expired conversations.
@@ -123,9 +293,9 @@ class ConversationMemory:
         ]
         
         for cid in expired_ids:
-            del self.conversations[cid]
+            self.delete_conversation(cid)
         
         return len(expired_ids)
 
 # Create a global conversation memory instance
-conversation_memory = ConversationMemory() 
\ No newline at end of file
+conversation_memory = ConversationMemory(budget_bytes=settings.MEMORY_BUDGET_BYTES) 
\ No newline at end of file
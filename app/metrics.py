@@ -0,0 +1,133 @@
+import asyncio
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+class Metrics:
+    """Simple in-process counters and latency summaries."""
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialize the metrics registry.
+
+        Args:
+            window: Number of recent observations kept per timing for percentiles
+        """
+        self.counters: Dict[str, float] = defaultdict(float)
+        self.gauges: Dict[str, float] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.window = window
+
+    def increment(self, name: str, value: float = 1) -> None:
+        """Increment a counter."""
+        self.counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Set a gauge to its current value (e.g. a queue depth)."""
+        self.gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        """
+        Record a single observation (usually a latency in milliseconds).
+
+        Args:
+            name: Name of the timing
+            value: Observed value
+        """
+        timing = self.timings.get(name)
+        if timing is None:
+            timing = {
+                "count": 0, "total": 0.0, "max": 0.0,
+                "recent": deque(maxlen=self.window), "recent_at": deque(maxlen=self.window)
+            }
+            self.timings[name] = timing
+
+        timing["count"] += 1
+        timing["total"] += value
+        timing["max"] = max(timing["max"], value)
+        timing["recent"].append(value)
+        timing["recent_at"].append(time.monotonic())
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Time the wrapped block in milliseconds and record it under `name`.
+
+        Cancelled blocks (e.g. discarded speculative calls) aren't recorded;
+        their truncated durations would understate the latency.
+        """
+        start = time.perf_counter()
+        cancelled = False
+        try:
+            yield
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def percentile(self, name: str, pct: float) -> Optional[float]:
+        """
+        Get a percentile over the recent observations of a timing.
+
+        Args:
+            name: Name of the timing
+            pct: Percentile between 0 and 100
+
+        Returns:
+            The percentile value or None if nothing has been recorded
+        """
+        timing = self.timings.get(name)
+        if not timing or not timing["recent"]:
+            return None
+
+        values = sorted(timing["recent"])
+        index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+        return values[index]
+
+    def recent(self, name: str, count: int, max_age: Optional[float] = None) -> List[float]:
+        """
+        Get up to `count` of the most recent observations of a timing.
+
+        Args:
+            name: Name of the timing
+            count: Maximum number of observations
+            max_age: Only include observations made within this many seconds
+
+        Returns:
+            Observations, oldest first
+        """
+        timing = self.timings.get(name)
+        if not timing:
+            return []
+        values = list(timing["recent"])[-count:]
+        if max_age is not None:
+            cutoff = time.monotonic() - max_age
+            observed_at = list(timing["recent_at"])[-count:]
+            values = [value for value, at in zip(values, observed_at) if at >= cutoff]
+        return values
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a JSON-serializable view of all counters, gauges and timings."""
+        timings = {}
+        for name, timing in self.timings.items():
+            timings[name] = {
+                "count": timing["count"],
+                "avg": timing["total"] / timing["count"] if timing["count"] else 0.0,
+                "max": timing["max"],
+                "p50": self.percentile(name, 50),
+                "p95": self.percentile(name, 95)
+            }
+
+        return {"counters": dict(self.counters), "gauges": dict(self.gauges), "timings": timings}
+
+    def reset(self) -> None:
+        """Clear all counters, gauges and timings."""
+        self.counters.clear()
+        self.gauges.clear()
+        self.timings.clear()
+
+# Create a global metrics instance
+metrics = Metrics()
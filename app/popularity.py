@@ -0,0 +1,76 @@
+import math
+import time
+from typing import Dict, List, Tuple
+from config import settings
+
+class PopularityTracker:
+    """
+    Exponentially decayed popularity counts for tool lookup keys.
+
+    Uses forward decay: each hit adds exp((t - landmark) / tau), so scores
+    can be compared directly without touching every key on each update.
+    Only the `max_keys` most popular keys are kept.
+    """
+
+    def __init__(self, half_life: float = 900, max_keys: int = 1000):
+        """
+        Initialize the tracker.
+
+        Args:
+            half_life: Seconds after which a hit counts half as much
+            max_keys: Maximum number of keys to track
+        """
+        self.tau = half_life / math.log(2)
+        self.max_keys = max_keys
+        self.landmark = time.time()
+        self.scores: Dict[Tuple[str, str], float] = {}
+
+    def record(self, tool_name: str, key: str) -> None:
+        """
+        Record a lookup.
+
+        Args:
+            tool_name: Name of the tool that served the lookup
+            key: Tool-specific lookup key (e.g. a sanitized location or ticker)
+        """
+        now = time.time()
+
+        # Rebase scores before the weights overflow
+        if (now - self.landmark) / self.tau > 50:
+            factor = math.exp(-(now - self.landmark) / self.tau)
+            self.scores = {k: score * factor for k, score in self.scores.items()}
+            self.landmark = now
+
+        entry = (tool_name, key)
+        self.scores[entry] = self.scores.get(entry, 0.0) + math.exp((now - self.landmark) / self.tau)
+
+        # Drop the least popular tenth once we go over the limit
+        if len(self.scores) > self.max_keys:
+            keep = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+            self.scores = dict(keep[:int(self.max_keys * 0.9)])
+
+    def score(self, tool_name: str, key: str) -> float:
+        """Get the decayed hit count of a key as of now."""
+        decay = math.exp(-(time.time() - self.landmark) / self.tau)
+        return self.scores.get((tool_name, key), 0.0) * decay
+
+    def top_k(self, k: int) -> List[Tuple[str, str]]:
+        """
+        Get the most popular keys.
+
+        Args:
+            k: Number of keys to return
+
+        Returns:
+            (tool_name, key) pairs, most popular first
+        """
+        ranked = sorted(self.scores.items(), key=lambda item: item[1], reverse=True)
+        return [entry for entry, _ in ranked[:k]]
+
+    def clear(self) -> None:
+        """Forget all recorded lookups."""
+        self.scores.clear()
+        self.landmark = time.time()
+
+# Create a global popularity tracker
+popularity = PopularityTracker(half_life=settings.POPULARITY_HALF_LIFE)
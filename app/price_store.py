@@ -0,0 +1,128 @@
+import os
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+from config import settings
+
+# Columns stored per ticker, with their dtypes
+COLUMNS = {
+    "dates": "datetime64[D]",
+    "close": "float64",
+    "volume": "int64"
+}
+
+class PriceStore:
+    """
+    Columnar store of daily price series keyed by ticker.
+
+    Each ticker's series is a set of NumPy arrays (one per column, sorted by
+    date) so aggregates can be computed with vectorized operations. With a
+    directory configured, every column is saved as `<dir>/<TICKER>/<column>.npy`
+    and can be memory-mapped instead of loaded; without one the store lives
+    in memory only.
+    """
+
+    def __init__(self, directory: Optional[str] = None, mmap: bool = False):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Where to persist series (None keeps them in memory only)
+            mmap: Memory-map persisted columns read-only instead of loading them
+        """
+        self.directory = directory
+        self.mmap = mmap
+        self.series: Dict[str, Dict[str, np.ndarray]] = {}
+
+    def tickers(self) -> List[str]:
+        """Get every ticker with a stored series (in memory or on disk)."""
+        tickers = set(self.series)
+        if self.directory and os.path.isdir(self.directory):
+            tickers.update(
+                name for name in os.listdir(self.directory)
+                if os.path.exists(self._path(name, "dates"))
+            )
+        return sorted(tickers)
+
+    def get(self, ticker: str) -> Optional[Dict[str, np.ndarray]]:
+        """
+        Get a ticker's series.
+
+        Args:
+            ticker: Sanitized ticker
+
+        Returns:
+            Column name -> array (sorted by date), or None if nothing is stored
+        """
+        series = self.series.get(ticker)
+        if series is None and self.directory and os.path.exists(self._path(ticker, "dates")):
+            mmap_mode = "r" if self.mmap else None
+            series = {column: np.load(self._path(ticker, column), mmap_mode=mmap_mode) for column in COLUMNS}
+            self.series[ticker] = series
+        return series
+
+    def last_date(self, ticker: str) -> Optional[np.datetime64]:
+        """Get the date of a ticker's most recent stored row, or None."""
+        series = self.get(ticker)
+        if series is None or not len(series["dates"]):
+            return None
+        return series["dates"][-1]
+
+    def append(self, ticker: str, dates: Sequence, close: Sequence[float], volume: Sequence[int]) -> int:
+        """
+        Add daily rows, keeping only those newer than what is already stored.
+
+        Args:
+            ticker: Sanitized ticker
+            dates: Row dates (any order; ISO strings or datetime64)
+            close: Closing prices, aligned with `dates`
+            volume: Traded volumes, aligned with `dates`
+
+        Returns:
+            Number of rows added
+        """
+        new = {
+            "dates": np.asarray(dates, dtype=COLUMNS["dates"]),
+            "close": np.asarray(close, dtype=COLUMNS["close"]),
+            "volume": np.asarray(volume, dtype=COLUMNS["volume"])
+        }
+        order = np.argsort(new["dates"])
+        new = {column: values[order] for column, values in new.items()}
+
+        last = self.last_date(ticker)
+        if last is not None:
+            keep = new["dates"] > last
+            new = {column: values[keep] for column, values in new.items()}
+
+        added = len(new["dates"])
+        if not added:
+            return 0
+
+        existing = self.get(ticker)
+        if existing is not None:
+            new = {column: np.concatenate([existing[column], new[column]]) for column in COLUMNS}
+
+        self.series[ticker] = new
+        if self.directory:
+            self._save(ticker, new)
+            if self.mmap:
+                # Re-open read-only so memory use stays bounded by the OS page cache
+                del self.series[ticker]
+        return added
+
+    def _path(self, ticker: str, column: str) -> str:
+        return os.path.join(self.directory, ticker, f"{column}.npy")
+
+    def _save(self, ticker: str, series: Dict[str, np.ndarray]) -> None:
+        os.makedirs(os.path.join(self.directory, ticker), exist_ok=True)
+        for column, values in series.items():
+            path = self._path(ticker, column)
+            # Write then rename so readers never see a partial file
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, values)
+            os.replace(f"{path}.tmp", path)
+
+# Create a global price store
+price_store = PriceStore(
+    directory=settings.PRICE_HISTORY_DIR or None,
+    mmap=settings.PRICE_HISTORY_MMAP
+)
@@ -0,0 +1,247 @@
+import cProfile
+import marshal
+import random
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Deque, Iterator, List, Optional, Tuple
+from config import settings
+from app.metrics import metrics
+from app.admission import admission
+
+# cProfile's key for a function: (filename, line number, function name)
+FunctionKey = Tuple[str, int, str]
+
+def format_function(function: FunctionKey) -> str:
+    """Format a cProfile function key like pstats does, e.g. "router.py:120(route_query)"."""
+    filename, line, name = function
+    if filename == "~":
+        return name  # Built-ins
+    return f"{filename}:{line}({name})"
+
+def to_speedscope(
+    stats: Dict[FunctionKey, tuple],
+    name: str,
+    max_depth: int = 64,
+    min_fraction: float = 0.0005,
+    max_nodes: int = 20000
+) -> Dict[str, Any]:
+    """
+    Convert cProfile stats to a speedscope "sampled" profile.
+
+    cProfile only records caller/callee totals, so the call tree is rebuilt
+    from the roots down, splitting each callee's time between its callers
+    in proportion to the per-edge timings (the same approximation used by
+    cProfile flame graph tools). Recursive calls are folded into the first
+    occurrence of the function on the stack. Inconsistent edge timings can
+    make that split charge a function for more than its own self time, so
+    each function's samples are capped at its self time.
+
+    The number of call paths can grow exponentially with the size of the
+    call graph, so subtrees under `min_fraction` of the total CPU time are
+    not expanded and at most `max_nodes` tree nodes are visited. Self time
+    the tree doesn't reach (pruned subtrees, and call cycles without a root
+    such as nested imports) is reported as flat single-frame samples, so
+    the weights always add up to the profile's CPU time.
+
+    Args:
+        stats: `cProfile.Profile.stats` after `create_stats()`
+        name: Profile name shown in speedscope
+        max_depth: Deepest stack to emit
+        min_fraction: Smallest share of the total CPU time expanded into a subtree
+        max_nodes: Most tree nodes visited
+
+    Returns:
+        A speedscope file (https://www.speedscope.app/file-format-schema.json)
+    """
+    callees: Dict[FunctionKey, Dict[FunctionKey, Tuple[float, float]]] = {}
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            # Edge tuples are (primitive calls, calls, self time, cumulative time)
+            callees.setdefault(caller, {})[function] = (edge[2], edge[3])
+
+    frames: List[Dict[str, Any]] = []
+    frame_index: Dict[FunctionKey, int] = {}
+    weights: Dict[Tuple[int, ...], float] = {}
+    emitted: Dict[FunctionKey, float] = {}
+    min_time = sum(entry[2] for entry in stats.values()) * min_fraction
+    budget = [max_nodes]
+
+    def frame(function: FunctionKey) -> int:
+        if function not in frame_index:
+            filename, line, func_name = function
+            frame_index[function] = len(frames)
+            entry = {"name": func_name if filename != "~" else format_function(function)}
+            if filename != "~":
+                entry.update({"file": filename, "line": line})
+            frames.append(entry)
+        return frame_index[function]
+
+    def add(stack: Tuple[int, ...], function: FunctionKey, self_time: float) -> None:
+        self_time = min(self_time, stats[function][2] - emitted.get(function, 0.0))
+        if self_time > 0:
+            weights[stack] = weights.get(stack, 0.0) + self_time
+            emitted[function] = emitted.get(function, 0.0) + self_time
+
+    def walk(function: FunctionKey, self_time: float, total_time: float, stack: Tuple[int, ...]) -> None:
+        budget[0] -= 1
+        stack = stack + (frame(function),)
+        add(stack, function, self_time)
+
+        function_total = stats[function][3]
+        if len(stack) >= max_depth or function_total <= 0:
+            return
+        share = total_time / function_total
+        for callee, (callee_self, callee_total) in callees.get(function, {}).items():
+            if frame_index.get(callee) in stack:
+                # Recursion: charge the self time to the caller already on the stack
+                add(stack[:stack.index(frame_index[callee]) + 1], callee, callee_self * share)
+            elif callee_total * share >= min_time and budget[0] > 0:
+                walk(callee, callee_self * share, callee_total * share, stack)
+
+    roots = [function for function, (_, _, _, _, callers) in stats.items() if not callers]
+    for root in roots:
+        walk(root, stats[root][2], stats[root][3], ())
+
+    for function, entry in stats.items():
+        add((frame(function),), function, entry[2] - emitted.get(function, 0.0))
+
+    total = sum(weights.values())
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "name": name,
+        "activeProfileIndex": 0,
+        "exporter": "askwiseai",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": total,
+            "samples": [list(stack) for stack in weights],
+            "weights": list(weights.values())
+        }]
+    }
+
+class RequestProfiler:
+    """
+    Sampled cProfile capture of individual requests.
+
+    A request is profiled when it asks to be (e.g. with an `X-Profile`
+    header) or when it is picked by the sample rate. Profiles measure CPU
+    time and are kept in a ring buffer of the last `capacity` captures.
+
+    Only one request is profiled at a time. cProfile follows the thread,
+    not the task, so a profile also includes any other coroutines the event
+    loop ran while the request was in flight. Each profile records how many
+    other admitted requests overlapped it (`other_requests`, None when
+    admission control is off); only profiles with 0 are the request alone.
+    """
+
+    def __init__(self, enabled: bool = False, capacity: int = 20, sample_rate: float = 0.0):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: Whether requests may be profiled at all
+            capacity: Number of profiles to keep
+            sample_rate: Fraction of requests profiled without being asked (0-1)
+        """
+        self.enabled = enabled
+        self.profiles: Deque[Dict[str, Any]] = deque(maxlen=capacity)
+        self.sample_rate = sample_rate
+        self._active = False
+
+    def should_profile(self, requested: bool = False) -> bool:
+        """Decide whether to profile a request that did or didn't ask for it."""
+        if not self.enabled or self._active:
+            return False
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def profile(self, label: str, requested: bool = False) -> Iterator[Optional[str]]:
+        """
+        Profile the wrapped block if the request is sampled.
+
+        Args:
+            label: Description stored with the profile (e.g. the endpoint and query)
+            requested: The request explicitly asked to be profiled
+
+        Yields:
+            The profile ID, or None if this request isn't profiled
+        """
+        if not self.should_profile(requested):
+            yield None
+            return
+
+        profile_id = uuid.uuid4().hex
+        profiler = cProfile.Profile(time.process_time)
+        self._active = True
+        # Requests already in flight (besides this one) plus those admitted before it finishes
+        in_flight, admitted = max(admission.in_flight - 1, 0), admission.admitted
+        started_at = time.time()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield profile_id
+        finally:
+            profiler.disable()
+            self._active = False
+            wall_ms = (time.perf_counter() - start) * 1000
+
+            profiler.create_stats()
+            self.profiles.append({
+                "profile_id": profile_id,
+                "label": label,
+                "started_at": started_at,
+                "wall_ms": wall_ms,
+                "cpu_ms": sum(entry[2] for entry in profiler.stats.values()) * 1000,
+                "other_requests": in_flight + admission.admitted - admitted if settings.ADMISSION_ENABLED else None,
+                "stats": profiler.stats
+            })
+            metrics.increment("profiling.captured")
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summarize the stored profiles, newest first, with their top functions by self time."""
+        summaries = []
+        for record in reversed(self.profiles):
+            top = sorted(record["stats"].items(), key=lambda item: item[1][2], reverse=True)[:5]
+            summaries.append({
+                **{key: value for key, value in record.items() if key != "stats"},
+                "top_functions": [
+                    {
+                        "function": format_function(function),
+                        "calls": calls,
+                        "self_ms": self_time * 1000,
+                        "cumulative_ms": total_time * 1000
+                    }
+                    for function, (_, calls, self_time, total_time, _) in top
+                ]
+            })
+        return summaries
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """Get a stored profile record, or None if it has been evicted."""
+        for record in self.profiles:
+            if record["profile_id"] == profile_id:
+                return record
+        return None
+
+    def export_pstats(self, profile_id: str) -> Optional[bytes]:
+        """Export a profile in the binary format read by `pstats.Stats` and snakeviz."""
+        record = self.get(profile_id)
+        return marshal.dumps(record["stats"]) if record else None
+
+    def export_speedscope(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        """Export a profile as speedscope JSON."""
+        record = self.get(profile_id)
+        return to_speedscope(record["stats"], record["label"]) if record else None
+
+# Create a global request profiler
+profiler = RequestProfiler(
+    enabled=settings.PROFILING_ENABLED,
+    capacity=settings.PROFILE_BUFFER_SIZE,
+    sample_rate=settings.PROFILE_SAMPLE_RATE
+)
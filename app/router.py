@@ -1,7 +1,38 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable, Awaitable
+import json
 import re
-from app.llm_service import get_llm_response
-from app.tools import get_tool, list_tools
+import time
+from config import settings
+from app.deadline import Deadline, DeadlineExceeded
+from app.llm_service import get_llm_response, LLMCacheMiss
+from app.metrics import metrics
+from app.popularity import popularity
+from app.speculation import Speculation, guess_tool_call
+from app.tools import get_tool, list_tools, accepts_deadline
+from app.tools.base import Tool
+
+# Queries matching this pattern need reasoning over the tool result, so they
+# are always answered through LLM synthesis rather than a template
+COMPLEX_QUERY_PATTERN = re.compile(
+    r"\b(compare|comparison|compared|versus|vs|better|worse|best|worst|should|"
+    r"why|explain|recommend|predict|forecast|trend|difference|analy[sz]e|"
+    r"opinion|advice|worth|if|would|could)\b",
+    re.IGNORECASE
+)
+
+def is_simple_lookup(query: str) -> bool:
+    """
+    Check whether a query is a plain lookup that a tool template can answer.
+    
+    Args:
+        query: The user's query
+        
+    Returns:
+        True for short, non-comparative, non-open-ended questions
+    """
+    if len(query.split()) > settings.SIMPLE_LOOKUP_MAX_WORDS:
+        return False
+    return COMPLEX_QUERY_PATTERN.search(query) is None
 
 # Enhanced routing prompt with better tool descriptions and examples
 ROUTING_PROMPT = """
@@ -33,17 +64,293 @@ Respond with JSON in this format:
 USER QUERY: {query}
 """
 
-async def route_query(query: str, context: Optional[str] = None) -> Dict[str, Any]:
+class DegradedResponseUnavailable(Exception):
+    """Raised when a degraded request can't be answered without upstream LLM calls."""
+    pass
+
+# Receives progress events ({"type": "routing" | "tool_call" | "tool_result" | "token" | "retry", ...})
+EventCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+async def emit(on_event: Optional[EventCallback], event_type: str, **data) -> None:
+    """Send a progress event if anyone is listening."""
+    if on_event is not None:
+        await on_event({"type": event_type, **data})
+
+def token_streamer(on_event: Optional[EventCallback]) -> Optional[Callable[[str], Awaitable[None]]]:
+    """Wrap an event callback as an `on_token` callback for `get_llm_response`."""
+    if on_event is None:
+        return None
+    
+    async def on_token(text: str) -> None:
+        await on_event({"type": "token", "text": text})
+    return on_token
+
+# Phrases that signal the fast model was not confident in its answer
+LOW_CONFIDENCE_PATTERN = re.compile(
+    r"(i'?m not sure|i am not sure|i don'?t know|i do not know|i cannot|i can'?t|"
+    r"unable to|not enough information|as an ai)",
+    re.IGNORECASE
+)
+
+def get_stage_model(stage: str) -> str:
+    """
+    Get the model configured for a pipeline stage.
+    
+    Args:
+        stage: One of routing, synthesis, tool_error, fallback or answer
+        
+    Returns:
+        The model name (DEFAULT_MODEL for every stage when the cascade is disabled)
+    """
+    if not settings.MODEL_CASCADE_ENABLED:
+        return settings.DEFAULT_MODEL
+    
+    return {
+        "routing": settings.ROUTING_MODEL,
+        "synthesis": settings.SYNTHESIS_MODEL,
+        "tool_error": settings.SYNTHESIS_MODEL,
+        "fallback": settings.FALLBACK_MODEL,
+        "answer": settings.ANSWER_MODEL
+    }.get(stage, settings.DEFAULT_MODEL)
+
+def is_valid_routing_decision(decision: Any, tools: Dict[str, Dict]) -> bool:
+    """
+    Check that a routing decision is well-formed and confident enough to act on.
+    
+    Args:
+        decision: Parsed routing JSON
+        tools: Available tools as returned by `list_tools`
+        
+    Returns:
+        True if the decision can be used without escalating
+    """
+    if not isinstance(decision, dict) or not isinstance(decision.get("use_tool"), bool):
+        return False
+    
+    if decision["use_tool"]:
+        if decision.get("tool_name") not in tools:
+            return False
+        if not isinstance(decision.get("tool_input", {}), dict):
+            return False
+    
+    try:
+        confidence = float(decision.get("confidence", 1.0))
+    except (TypeError, ValueError):
+        return False
+    return confidence >= settings.CASCADE_MIN_CONFIDENCE
+
+def is_nonempty_answer(response: Any) -> bool:
+    """Check that a free-text answer is non-empty (for prompts that ask the model to explain a failure)."""
+    return isinstance(response, str) and bool(response.strip())
+
+def is_confident_answer(response: Any) -> bool:
+    """Check that a free-text answer is non-empty and not hedged."""
+    if not is_nonempty_answer(response):
+        return False
+    return LOW_CONFIDENCE_PATTERN.search(response) is None
+
+async def cascade_llm_response(
+    prompt: str,
+    stage: str,
+    validate: Callable[[Any], bool],
+    on_event: Optional[EventCallback] = None,
+    **kwargs
+) -> Any:
+    """
+    Get a response from the stage's model, escalating to DEFAULT_MODEL when
+    the output fails validation.
+    
+    Args:
+        prompt: The prompt to send to the LLM
+        stage: Pipeline stage, used to pick the model and for accounting
+        validate: Returns True if the response can be used as-is
+        on_event: Optional callback that receives streamed text responses as token events
+        **kwargs: Extra arguments for `get_llm_response`
+        
+    Returns:
+        The LLM response
+    """
+    streaming = on_event is not None and not kwargs.get("response_format")
+    if streaming:
+        kwargs["on_token"] = token_streamer(on_event)
+    
+    model = get_stage_model(stage)
+    if model == settings.DEFAULT_MODEL:
+        return await get_llm_response(prompt, model=model, stage=stage, **kwargs)
+    
+    try:
+        response = await get_llm_response(prompt, model=model, stage=stage, **kwargs)
+        if validate(response):
+            return response
+        print(f"Escalating {stage} from {model}: response failed validation")
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        print(f"Escalating {stage} from {model}: {str(e)}")
+    
+    metrics.increment(f"cascade.{stage}.escalations")
+    if streaming:
+        # Tell listeners to discard the tokens streamed by the fast model
+        await emit(on_event, "retry", stage=stage)
+    return await get_llm_response(prompt, model=settings.DEFAULT_MODEL, stage=stage, **kwargs)
+
+def tool_error_prompt(tool_name: str, tool_input: Dict[str, Any], error: str) -> str:
+    """
+    Build the prompt that explains a failed tool call to the user.
+    
+    The prompt depends only on the failure, not on the user's wording, so
+    repeated failures share one LLM cache entry.
+    
+    Args:
+        tool_name: Name of the tool that failed
+        tool_input: Parameters the tool was called with
+        error: The tool's error message
+        
+    Returns:
+        The prompt
+    """
+    parameters = json.dumps(tool_input, sort_keys=True, default=str)
+    return f"""
+    I tried to look something up with the {tool_name} tool using these parameters: {parameters}
+    The tool failed with this error: {error}
+    
+    In two or three sentences, explain the issue to the user and suggest what they could try instead
+    (for example checking the spelling or trying again later). Don't invent any data.
+    """
+
+async def execute_tool(tool: Tool, tool_input: Dict[str, Any], deadline: Optional[Deadline] = None) -> Any:
+    """Run a tool within the request deadline and record its latency."""
+    kwargs = {key: value for key, value in tool_input.items() if key != "deadline"}
+    if deadline is not None and accepts_deadline(tool):
+        kwargs["deadline"] = deadline
+    
+    with metrics.timer(f"tool.{tool.name}_ms"):
+        return await tool.execute(**kwargs)
+
+def record_tool_use(tool: Tool, tool_input: Dict[str, Any]) -> None:
+    """
+    Count a tool call that answered a query towards its key's popularity.
+    
+    Only calls whose result is used are counted, so discarded speculative
+    calls don't make the cache warmer refresh keys nobody asked for.
+    """
+    key = tool.lookup_key(tool_input)
+    if key:
+        popularity.record(tool.name, key)
+
+async def route_degraded(query: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+    """
+    Answer without the routing or synthesis LLM calls, for use under overload.
+    
+    Tool lookups are picked by the local heuristic and answered from the
+    tool's template; anything else is only answered from the LLM cache.
+    
+    Args:
+        query: The user's query
+        deadline: Optional request deadline
+        
+    Returns:
+        Response data including the answer and any tool usage
+        
+    Raises:
+        DegradedResponseUnavailable: If the query needs an upstream LLM call
+    """
+    # The guess is the answer here, with no LLM to catch a wrong one
+    guess = guess_tool_call(query, strict=True)
+    tool = get_tool(guess[0]) if guess else None
+    if tool:
+        tool_name, tool_input = guess
+        tool_output = await execute_tool(tool, tool_input, deadline)
+        record_tool_use(tool, tool_input)
+        response = tool.render(tool_output, query)
+        if response is None:
+            raise DegradedResponseUnavailable(f"No templated answer for {tool_name} result")
+        
+        return {
+            "response": response,
+            "tool_used": tool_name,
+            "tool_input": tool_input,
+            "tool_output": tool_output,
+            "tool_cache_key": tool.result_cache_key(tool_input),
+            "synthesis": "template",
+            "degraded": True
+        }
+    
+    # Direct answers may have been cached by either cascade model
+    for model in dict.fromkeys([get_stage_model("answer"), settings.DEFAULT_MODEL]):
+        try:
+            response = await get_llm_response(query, model=model, stage="answer", cache_only=True)
+            return {"response": response, "degraded": True}
+        except LLMCacheMiss:
+            continue
+    
+    raise DegradedResponseUnavailable("No cached answer for this query")
+
+async def answer_directly(
+    query: str,
+    speculation: Speculation,
+    on_event: Optional[EventCallback] = None,
+    deadline: Optional[Deadline] = None
+) -> str:
+    """Answer from the LLM, reusing a speculative direct answer if one is running."""
+    speculative = speculation.take_answer()
+    if speculative is not None:
+        response = await speculative
+        await emit(on_event, "token", text=response)
+        return response
+    return await cascade_llm_response(
+        query, stage="answer", validate=is_confident_answer, on_event=on_event, deadline=deadline
+    )
+
+async def route_query(
+    query: str,
+    context: Optional[str] = None,
+    on_event: Optional[EventCallback] = None,
+    degraded: bool = False,
+    deadline: Optional[Deadline] = None
+) -> Dict[str, Any]:
     """
     Route the query to either the LLM or an appropriate tool
     
     Args:
         query: The user's query
         context: Optional conversation context
+        on_event: Optional callback for progress events and streamed answer tokens
+        degraded: Skip the routing and synthesis LLM calls (see `route_degraded`)
+        deadline: Optional request deadline; every LLM and tool call uses its remaining budget
     
     Returns:
         Response data including the answer and any tool usage
     """
+    if degraded:
+        return await route_degraded(query, deadline)
+    
+    # Start the likely branch while the routing LLM decides; whatever the
+    # router doesn't pick is cancelled on the way out
+    speculation = Speculation()
+    if settings.SPECULATION_ENABLED:
+        guess = guess_tool_call(query)
+        guessed_tool = get_tool(guess[0]) if guess else None
+        if guessed_tool:
+            speculation.start_tool(guess[0], guess[1], execute_tool(guessed_tool, guess[1], deadline))
+        elif guess is None and settings.SPECULATE_DIRECT_ANSWER:
+            speculation.start_answer(
+                cascade_llm_response(query, stage="answer", validate=is_confident_answer, deadline=deadline)
+            )
+    
+    try:
+        return await _route_query(query, context, speculation, on_event, deadline)
+    finally:
+        speculation.cancel()
+
+async def _route_query(
+    query: str,
+    context: Optional[str],
+    speculation: Speculation,
+    on_event: Optional[EventCallback],
+    deadline: Optional[Deadline]
+) -> Dict[str, Any]:
+    """Make the routing decision and run the chosen branch."""
     # Get all available tools with descriptions
     tools = list_tools()
     
@@ -91,6 +398,7 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
     {{
       "use_tool": true/false,
       "reasoning": "Brief explanation of your decision",
+      "confidence": number between 0 and 1 (how sure you are about this decision),
       "tool_name": "tool_name" (if use_tool is true),
       "tool_input": {{key-value parameters for the tool}} (if use_tool is true)
     }}
@@ -99,10 +407,13 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
     """
     
     # Ask LLM to decide whether to use a tool
-    routing_decision = await get_llm_response(
+    routing_decision = await cascade_llm_response(
         routing_prompt,
+        stage="routing",
+        validate=lambda decision: is_valid_routing_decision(decision, tools),
         response_format={"type": "json_object"},
-        temperature=0.1  # Lower temperature for more consistent tool selection
+        temperature=0.1,  # Lower temperature for more consistent tool selection
+        deadline=deadline
     )
     
     # Log the routing decision for debugging
@@ -111,6 +422,12 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
     # Parse the routing decision
     try:
         decision = routing_decision
+        await emit(
+            on_event, "routing",
+            use_tool=bool(decision.get("use_tool", False)),
+            tool_name=decision.get("tool_name"),
+            reasoning=decision.get("reasoning", "")
+        )
         
         if decision.get("use_tool", False):
             tool_name = decision.get("tool_name")
@@ -124,28 +441,69 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
                 print(f"Using tool: {tool_name} with parameters: {tool_input}")
                 
                 try:
-                    tool_output = await tool.execute(**tool_input)
+                    await emit(on_event, "tool_call", tool_name=tool_name, tool_input=tool_input)
+                    speculative = speculation.take_tool(tool_name, tool_input)
+                    if speculative is not None:
+                        tool_output = await speculative
+                    else:
+                        tool_output = await execute_tool(tool, tool_input, deadline)
+                    record_tool_use(tool, tool_input)
+                    await emit(on_event, "tool_result", tool_name=tool_name, tool_output=tool_output)
                     
-                    # Generate a response that incorporates the tool output
-                    context_prompt = f"""
-                    The user asked: "{query}"
+                    # Answer simple lookups from the tool's template when possible
+                    response = None
+                    synthesis = "llm"
+                    start = time.perf_counter()
+                    if settings.TEMPLATED_TOOL_ANSWERS and is_simple_lookup(query):
+                        response = tool.render(tool_output, query)
+                        if response is not None:
+                            synthesis = "template"
+                            await emit(on_event, "token", text=response)
                     
-                    I used the {tool_name} tool with these parameters: {tool_input}
-                    The tool returned this information: {tool_output}
+                    if response is None and isinstance(tool_output, dict) and "error" in tool_output:
+                        # Explain the failure without the query in the prompt, so the
+                        # same failure is explained from the LLM cache next time
+                        synthesis = "error"
+                        response = await cascade_llm_response(
+                            tool_error_prompt(tool_name, tool_input, tool_output["error"]),
+                            stage="tool_error",
+                            validate=is_nonempty_answer,
+                            on_event=on_event,
+                            temperature=0,
+                            deadline=deadline
+                        )
                     
-                    Please provide a helpful, natural-sounding response that answers the user's question
-                    using this information. If the tool returned an error, explain the issue to the user.
-                    """
+                    if response is None:
+                        # Generate a response that incorporates the tool output
+                        context_prompt = f"""
+                        The user asked: "{query}"
+                        
+                        I used the {tool_name} tool with these parameters: {tool_input}
+                        The tool returned this information: {tool_output}
+                        
+                        Please provide a helpful, natural-sounding response that answers the user's question
+                        using this information. If the tool returned an error, explain the issue to the user.
+                        """
+                        
+                        response = await cascade_llm_response(
+                            context_prompt, stage="synthesis", validate=is_confident_answer,
+                            on_event=on_event, deadline=deadline
+                        )
                     
-                    response = await get_llm_response(context_prompt)
+                    # Record synthesis latency so template and LLM paths can be compared
+                    metrics.observe(f"synthesis.{synthesis}_ms", (time.perf_counter() - start) * 1000)
                     
                     return {
                         "response": response,
                         "tool_used": tool_name,
                         "tool_input": tool_input,
                         "tool_output": tool_output,
-                        "reasoning": reasoning
+                        "tool_cache_key": tool.result_cache_key(tool_input),
+                        "reasoning": reasoning,
+                        "synthesis": synthesis
                     }
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
                     # Handle tool execution errors
                     error_message = f"Error executing {tool_name} tool: {str(e)}"
@@ -161,7 +519,10 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
                     answer based on your knowledge, clearly indicating the limitations.
                     """
                     
-                    response = await get_llm_response(fallback_prompt)
+                    response = await cascade_llm_response(
+                        fallback_prompt, stage="fallback", validate=is_nonempty_answer,
+                        on_event=on_event, deadline=deadline
+                    )
                     
                     return {
                         "response": response,
@@ -169,9 +530,10 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
                     }
             else:
                 # Fallback to LLM if tool not found
+                prefix = f"I wanted to use the {tool_name} tool, but it's not available. Let me answer based on my knowledge instead: "
+                await emit(on_event, "token", text=prefix)
                 return {
-                    "response": f"I wanted to use the {tool_name} tool, but it's not available. Let me answer based on my knowledge instead: " + 
-                               await get_llm_response(query)
+                    "response": prefix + await answer_directly(query, speculation, on_event, deadline)
                 }
         else:
             # Use LLM for general knowledge
@@ -179,15 +541,17 @@ async def route_query(query: str, context: Optional[str] = None) -> Dict[str, An
             print(f"Using LLM directly. Reasoning: {reasoning}")
             
             return {
-                "response": await get_llm_response(query),
+                "response": await answer_directly(query, speculation, on_event, deadline),
                 "reasoning": reasoning
             }
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         # Fallback to LLM on parsing error
         error_message = f"Error in routing decision: {str(e)}"
         print(error_message)
         
         return {
-            "response": await get_llm_response(query),
+            "response": await answer_directly(query, speculation, on_event, deadline),
             "error": error_message
         } 
\ No newline at end of file
@@ -0,0 +1,166 @@
+import asyncio
+from collections import deque
+from typing import Dict, Any, Optional, Deque, Tuple, Callable, Awaitable
+from app.memory import conversation_memory, ConversationMemory
+from app.deadline import Deadline, run_with_deadline
+from app.router import route_query
+from config import settings
+from app.utils.logging import logger
+
+class ConversationSession:
+    """
+    A WebSocket session bound to one conversation.
+
+    Turns are processed one at a time in the order they arrive, so clients
+    can pipeline several messages without waiting for each answer. The
+    rendered conversation context is kept in the session and updated
+    incrementally instead of being rebuilt from `ConversationMemory` on
+    every turn; messages are still written to memory so the conversation
+    can be continued over HTTP.
+    """
+
+    def __init__(
+        self,
+        conversation_id: str,
+        send: Callable[[Dict[str, Any]], Awaitable[None]],
+        memory: ConversationMemory = conversation_memory,
+        max_turns: int = 3
+    ):
+        """
+        Initialize the session.
+
+        Args:
+            conversation_id: ID of the conversation this session is bound to
+            send: Coroutine used to push events to the client
+            memory: Conversation store to persist messages in
+            max_turns: Number of turns included in the routing context
+        """
+        self.conversation_id = conversation_id
+        self.send = send
+        self.memory = memory
+
+        # Each turn is user + assistant
+        self.rendered: Deque[str] = deque(maxlen=max_turns * 2)
+        for msg in memory.get_messages(conversation_id)[-(max_turns * 2):]:
+            self.rendered.append(memory.format_message(msg["role"], msg["content"]))
+
+        self.pending: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+        self.current: Optional[asyncio.Task] = None
+        self.current_turn: Optional[int] = None
+        self.next_turn = 1
+        self._worker: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def context(self) -> str:
+        """Get the rendered conversation context."""
+        if not self.rendered:
+            return ""
+        return "Previous conversation:\n" + "".join(self.rendered)
+
+    def start(self) -> None:
+        """Start processing submitted turns."""
+        self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, query: str, interrupt: bool = False) -> int:
+        """
+        Queue a user message.
+
+        Args:
+            query: The user's message
+            interrupt: Cancel the in-flight turn and any queued turns first
+
+        Returns:
+            The turn number assigned to the message
+        """
+        if interrupt:
+            await self.cancel()
+
+        turn = self.next_turn
+        self.next_turn += 1
+        await self.pending.put((turn, query))
+        await self.send({"type": "queued", "turn": turn, "position": self.pending.qsize()})
+        return turn
+
+    async def cancel(self) -> None:
+        """Cancel the in-flight turn and drop any queued turns."""
+        while not self.pending.empty():
+            turn, _ = self.pending.get_nowait()
+            await self.send({"type": "cancelled", "turn": turn})
+
+        if self.current is not None and not self.current.done():
+            self.current.cancel()
+            try:
+                await self.current
+            except asyncio.CancelledError:
+                pass
+
+    async def close(self) -> None:
+        """Cancel all work; called when the client disconnects."""
+        self._closing = True
+        if self._worker is not None:
+            self._worker.cancel()
+        if self.current is not None:
+            self.current.cancel()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            turn, query = await self.pending.get()
+            self.current_turn = turn
+            self.current = asyncio.create_task(self._process_turn(turn, query))
+            try:
+                await self.current
+            except asyncio.CancelledError:
+                if self._closing:
+                    raise
+                logger.info(f"Cancelled turn {turn} in conversation {self.conversation_id}")
+                await self.send({"type": "cancelled", "turn": turn})
+            except Exception as e:
+                logger.error(f"Error processing turn {turn}: {str(e)}", exc_info=True)
+                await self.send({"type": "error", "turn": turn, "detail": str(e)})
+            finally:
+                self.current = None
+                self.current_turn = None
+
+    async def _process_turn(self, turn: int, query: str) -> None:
+        self.memory.add_message(self.conversation_id, role="user", content=query)
+        dropped = self.rendered[0] if len(self.rendered) == self.rendered.maxlen else None
+        self.rendered.append(self.memory.format_message("user", query))
+
+        async def on_event(event: Dict[str, Any]) -> None:
+            await self.send({**event, "turn": turn})
+
+        deadline = Deadline(settings.REQUEST_DEADLINE_SECONDS)
+        try:
+            result = await run_with_deadline(
+                route_query(query, context=self.context(), on_event=on_event, deadline=deadline),
+                deadline
+            )
+        except (asyncio.CancelledError, Exception):
+            # Take back the unanswered question so later turns don't see it
+            self.rendered.pop()
+            if dropped is not None:
+                self.rendered.appendleft(dropped)
+            self.memory.remove_last_message(self.conversation_id, role="user")
+            raise
+
+        self.memory.add_message(
+            conversation_id=self.conversation_id,
+            role="assistant",
+            content=result["response"],
+            metadata={
+                "tool_used": result.get("tool_used"),
+                "tool_input": result.get("tool_input"),
+                "tool_output": result.get("tool_output"),
+                "tool_cache_key": result.get("tool_cache_key")
+            }
+        )
+        self.rendered.append(self.memory.format_message("assistant", result["response"]))
+
+        await self.send({
+            "type": "answer",
+            "turn": turn,
+            "response": result["response"],
+            "tool_used": result.get("tool_used"),
+            "tool_input": result.get("tool_input"),
+            "tool_output": result.get("tool_output")
+        })
@@ -0,0 +1,227 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+# File header: magic, format version, slot count, slot size
+HEADER = struct.Struct("<4sIII")
+HEADER_SIZE = 64
+MAGIC = b"AWSC"
+VERSION = 1
+
+# Slot header: sequence number, key digest, expiry, payload length, payload CRC32
+SLOT = struct.Struct("<Q16sdII")
+
+# Slots tried for a key before evicting (linear probing)
+PROBES = 4
+
+# Reads retried when they race a writer
+READ_RETRIES = 3
+
+# Identifies one write of a slot: (slot index, sequence number after the write)
+Version = Tuple[int, int]
+
+class SharedCache:
+    """
+    Fixed-size hash table in a memory-mapped file, shared by every process on the host.
+
+    Used as a second tier behind the per-process `SimpleCache`, so uvicorn
+    workers see each other's entries. Each slot holds one JSON-encoded value
+    and is protected by a seqlock: writers take an fcntl lock on the slot's
+    byte range and bump the slot's sequence number before and after writing
+    (odd while a write is in progress); readers don't lock, and retry when the
+    sequence number is odd or changed under them. A CRC32 of the payload
+    guards against torn reads the sequence check could miss.
+
+    Every write leaves a new sequence number, so `(slot, sequence)` is a
+    version of the entry; `is_current` tells a process whether a copy it
+    holds has since been overwritten, deleted or cleared by anyone.
+
+    Keys probe `PROBES` consecutive slots. A key already stored is
+    overwritten in place; otherwise the first free or expired slot is used,
+    and when they are all taken, the entry that expires first is overwritten. Values larger than a slot aren't shared.
+    """
+
+    def __init__(self, path: str, slots: int = 4096, slot_size: int = 8192):
+        """
+        Open (creating if needed) the shared cache file.
+
+        Other processes may have the file mapped, so an existing file is
+        never resized; give each layout its own file (see `shared_tier`).
+
+        Args:
+            path: File to map; use a tmpfs path such as /dev/shm to keep it in memory
+            slots: Number of slots in the table
+            slot_size: Bytes per slot, including the slot header
+
+        Raises:
+            ValueError: If the file exists with a different layout
+        """
+        self.path = path
+        self.slots = slots
+        self.slot_size = slot_size
+        self.capacity = slot_size - SLOT.size
+        size = HEADER_SIZE + slots * slot_size
+
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            if os.fstat(self.fd).st_size == 0:
+                # New file: start empty
+                os.ftruncate(self.fd, size)
+                os.pwrite(self.fd, HEADER.pack(MAGIC, VERSION, slots, slot_size), 0)
+            header = os.pread(self.fd, HEADER.size, 0)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+
+        if len(header) < HEADER.size or HEADER.unpack(header) != (MAGIC, VERSION, slots, slot_size):
+            os.close(self.fd)
+            raise ValueError(f"Shared cache file {path} has a different layout")
+
+        self.map = mmap.mmap(self.fd, size)
+
+    def _digest(self, key: str) -> bytes:
+        return hashlib.md5(key.encode("utf-8")).digest()
+
+    def _offset(self, index: int) -> int:
+        return HEADER_SIZE + index * self.slot_size
+
+    def _candidates(self, digest: bytes):
+        start = int.from_bytes(digest[:8], "little") % self.slots
+        return [(start + probe) % self.slots for probe in range(PROBES)]
+
+    def _read(self, index: int) -> Optional[Tuple[bytes, float, bytes, int]]:
+        """Read a consistent (digest, expiry, payload, sequence) from a slot, or None if it's empty or busy."""
+        offset = self._offset(index)
+        for _ in range(READ_RETRIES):
+            sequence, digest, expiry, length, crc = SLOT.unpack_from(self.map, offset)
+            if sequence == 0:
+                return None
+            if sequence % 2 or length > self.capacity:
+                continue
+
+            payload = self.map[offset + SLOT.size:offset + SLOT.size + length]
+            if SLOT.unpack_from(self.map, offset)[0] == sequence and zlib.crc32(payload) == crc:
+                return digest, expiry, payload, sequence
+        return None
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """
+        Look up a key.
+
+        Args:
+            key: Cache key (already hashed by `SimpleCache`)
+
+        Returns:
+            (value, expiry timestamp), or None if missing or expired
+        """
+        entry = self.lookup(key)
+        return entry[:2] if entry is not None else None
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, float, Version]]:
+        """
+        Look up a key along with the version of its entry.
+
+        Args:
+            key: Cache key (already hashed by `SimpleCache`)
+
+        Returns:
+            (value, expiry timestamp, version), or None if missing or expired
+        """
+        digest = self._digest(key)
+        now = time.time()
+        for index in self._candidates(digest):
+            entry = self._read(index)
+            if entry is not None and entry[0] == digest:
+                if entry[1] <= now:
+                    return None
+                return json.loads(entry[2]), entry[1], (index, entry[3])
+        return None
+
+    def is_current(self, version: Version) -> bool:
+        """Check that the slot hasn't been written since the entry with this version was read or stored."""
+        index, sequence = version
+        return struct.unpack_from("<Q", self.map, self._offset(index))[0] == sequence
+
+    def set(self, key: str, value: Any, expiry: float) -> Optional[Version]:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key (already hashed by `SimpleCache`)
+            value: JSON-serializable value
+            expiry: Absolute expiry timestamp
+
+        Returns:
+            The version of the new entry, or None if the value was too large to share
+        """
+        payload = json.dumps(value, default=str).encode("utf-8")
+        if len(payload) > self.capacity:
+            return None
+
+        digest = self._digest(key)
+        now = time.time()
+        entries = [(index, self._read(index)) for index in self._candidates(digest)]
+
+        # Overwrite the key's own slot, so an older copy can't outlive the new one
+        target = next((index for index, entry in entries if entry is not None and entry[0] == digest), None)
+        if target is None:
+            target = next((index for index, entry in entries if entry is None or entry[1] <= now), None)
+        if target is None:
+            target = min(entries, key=lambda item: item[1][1])[0]
+
+        return target, self._write(target, digest, expiry, payload)
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+        digest = self._digest(key)
+        for index in self._candidates(digest):
+            entry = self._read(index)
+            if entry is not None and entry[0] == digest:
+                self._write(index, digest, 0.0, b"")
+
+    def clear(self) -> None:
+        """Empty every slot."""
+        for index in range(self.slots):
+            offset = self._offset(index)
+            if SLOT.unpack_from(self.map, offset)[0] != 0:
+                self._write(index, b"\0" * 16, 0.0, b"")
+
+    def _write(self, index: int, digest: bytes, expiry: float, payload: bytes) -> int:
+        offset = self._offset(index)
+        fcntl.lockf(self.fd, fcntl.LOCK_EX, self.slot_size, offset)
+        try:
+            sequence = SLOT.unpack_from(self.map, offset)[0]
+            # Odd sequence: readers back off until the write is done
+            struct.pack_into("<Q", self.map, offset, sequence + 1)
+            self.map[offset + SLOT.size:offset + SLOT.size + len(payload)] = payload
+            SLOT.pack_into(self.map, offset, sequence + 1, digest, expiry, len(payload), zlib.crc32(payload))
+            struct.pack_into("<Q", self.map, offset, sequence + 2)
+        finally:
+            fcntl.lockf(self.fd, fcntl.LOCK_UN, self.slot_size, offset)
+        return sequence + 2
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count live entries.
+
+        Returns:
+            Live entry count, slot count and the size of the mapped file
+        """
+        now = time.time()
+        live = 0
+        for index in range(self.slots):
+            entry = self._read(index)
+            if entry is not None and entry[1] > now:
+                live += 1
+        return {"entries": live, "slots": self.slots, "mapped_bytes": len(self.map)}
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self.map.close()
+        os.close(self.fd)
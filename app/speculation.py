@@ -0,0 +1,214 @@
+import asyncio
+import re
+import time
+from typing import Dict, Any, Optional, Tuple, Awaitable
+from config import settings
+from app.metrics import metrics
+from app.symbols import symbol_index
+from app.utils.text_index import normalize_text
+
+# Local heuristics for guessing a tool call before the routing LLM answers
+WEATHER_PATTERN = re.compile(
+    r"\b(?:weather|temperature|raining|snowing|sunny|humid|humidity|windy)\b.*?"
+    r"\b(?:in|for|at)\s+(?P<location>[A-Za-z][A-Za-z .,'-]*?)"
+    r"\s*(?:right now|today|currently|now)?\s*[?.!]*$",
+    re.IGNORECASE
+)
+STOCK_PATTERN = re.compile(
+    r"\b(?:stock|stocks|share|shares|price|trading|quote|ticker|doing|performing)\b", re.IGNORECASE
+)
+# Words that make a company name mean its stock ("Delta shares", not "a Delta flight")
+STOCK_KEYWORDS = {"stock", "stocks", "share", "shares", "quote", "ticker"}
+STOCK_KEYWORD_PATTERN = re.compile(r"\b(?:" + "|".join(sorted(STOCK_KEYWORDS)) + r")\b", re.IGNORECASE)
+
+# Words either side of a company name searched for a stock keyword
+STOCK_KEYWORD_WINDOW = 2
+
+TICKER_PATTERN = re.compile(r"(?:\$(?P<cashtag>[A-Za-z]{1,5})\b|\b(?P<ticker>[A-Z]{1,5})\b)")
+
+# Upper-case words that look like tickers but usually aren't
+TICKER_STOPWORDS = {"I", "A", "AM", "AN", "AND", "ARE", "AT", "CEO", "IS", "IT", "OF", "ON", "THE", "US", "USA", "USD", "WHAT"}
+
+def guess_tool_call(query: str, strict: bool = False) -> Optional[Tuple[str, Dict[str, Any]]]:
+    """
+    Guess which tool the router is likely to pick for a query.
+
+    Args:
+        query: The user's query
+        strict: The guess is used as the final answer (degraded mode), not
+            just to start a call early; stock lookups then need a cashtag,
+            a listed ticker, or a stock keyword ("shares", "stock", ...)
+            next to the company name or unlisted ticker
+
+    Returns:
+        A (tool_name, tool_input) pair, or None if no tool looks likely
+    """
+    weather_match = WEATHER_PATTERN.search(query)
+    if weather_match:
+        location = weather_match.group("location").strip(" ,.")
+        if location:
+            return "weather", {"location": location}
+
+    if STOCK_PATTERN.search(query):
+        matches = list(TICKER_PATTERN.finditer(query))
+        cashtags = [match.group("cashtag").upper() for match in matches if match.group("cashtag")]
+        if strict and cashtags:
+            return "stocks", {"ticker": cashtags[0]}
+
+        tickers = [(match.group("cashtag") or match.group("ticker")).upper() for match in matches]
+        tickers = [ticker for ticker in tickers if ticker not in TICKER_STOPWORDS]
+        # Upper-case words like "NYC" only count as tickers next to "stock", "shares", ...
+        explicit = not strict or STOCK_KEYWORD_PATTERN.search(query) is not None
+        if not settings.SYMBOL_INDEX_ENABLED:
+            return ("stocks", {"ticker": tickers[0]}) if tickers and explicit else None
+
+        # Prefer listed tickers, then company names ("how is Microsoft doing")
+        for ticker in tickers:
+            if symbol_index.is_listed(ticker):
+                return "stocks", {"ticker": ticker}
+        words = normalize_text(query).split()
+        found = symbol_index.find_name(words)
+        if found is not None:
+            ticker, start, end = found
+            nearby = words[max(0, start - STOCK_KEYWORD_WINDOW):start] + words[end:end + STOCK_KEYWORD_WINDOW]
+            # "price of a visa" or "a Delta flight" name a company without asking about its stock
+            if not strict or STOCK_KEYWORDS.intersection(nearby):
+                return "stocks", {"ticker": ticker}
+        if tickers and explicit and not settings.REJECT_UNLISTED_TICKERS:
+            return "stocks", {"ticker": tickers[0]}
+
+    return None
+
+def same_tool_call(
+    first: Tuple[str, Dict[str, Any]],
+    second: Tuple[str, Dict[str, Any]]
+) -> bool:
+    """Compare two tool calls, ignoring case and surrounding whitespace in values and resolving company names to tickers."""
+    def normalize_value(key: str, value: Any) -> str:
+        value = str(value).strip()
+        if key == "ticker" and settings.SYMBOL_INDEX_ENABLED:
+            value = symbol_index.resolve(value) or value
+        return value.lower()
+
+    def normalize(call: Tuple[str, Dict[str, Any]]) -> Tuple[str, Dict[str, str]]:
+        name, tool_input = call
+        return name, {key: normalize_value(key, value) for key, value in (tool_input or {}).items()}
+
+    return normalize(first) == normalize(second)
+
+class SpeculationBudget:
+    """Token bucket limiting how many speculative upstream calls we make per minute."""
+
+    def __init__(self, per_minute: int):
+        """
+        Initialize the budget.
+
+        Args:
+            per_minute: Maximum sustained speculative calls per minute (also the burst size)
+        """
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.updated_at = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        """
+        Take one call from the budget.
+
+        Returns:
+            True if the call fits within the budget
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.capacity / 60)
+        self.updated_at = now
+
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+class Speculation:
+    """Speculative work started alongside the routing decision for a single query."""
+
+    def __init__(self):
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.tool_call: Optional[Tuple[str, Dict[str, Any]]] = None
+        self.started_at: Dict[str, float] = {}
+        self.finished_at: Dict[str, float] = {}
+
+    def _start(self, kind: str, budget: SpeculationBudget, coro: Awaitable[Any]) -> bool:
+        if not budget.try_acquire():
+            metrics.increment(f"speculation.{kind}.skipped_budget")
+            coro.close()
+            return False
+
+        task = asyncio.ensure_future(coro)
+        self.tasks[kind] = task
+        self.started_at[kind] = time.perf_counter()
+        task.add_done_callback(lambda _: self.finished_at.setdefault(kind, time.perf_counter()))
+        metrics.increment(f"speculation.{kind}.launched")
+        return True
+
+    def start_tool(self, tool_name: str, tool_input: Dict[str, Any], coro: Awaitable[Any]) -> bool:
+        """
+        Start a speculative tool call.
+
+        Args:
+            tool_name: Name of the guessed tool
+            tool_input: Guessed tool parameters
+            coro: The `tool.execute(...)` coroutine
+
+        Returns:
+            True if the call was started, False if the budget was exhausted
+        """
+        started = self._start("tool", tool_budget, coro)
+        if started:
+            self.tool_call = (tool_name, tool_input)
+        return started
+
+    def start_answer(self, coro: Awaitable[Any]) -> bool:
+        """Start a speculative direct-answer LLM call."""
+        return self._start("answer", answer_budget, coro)
+
+    def _take(self, kind: str) -> asyncio.Task:
+        task = self.tasks.pop(kind)
+        end = self.finished_at.get(kind, time.perf_counter())
+        metrics.increment(f"speculation.{kind}.hits")
+        metrics.observe(f"speculation.{kind}.saved_ms", (end - self.started_at[kind]) * 1000)
+        return task
+
+    def take_tool(self, tool_name: str, tool_input: Dict[str, Any]) -> Optional[asyncio.Task]:
+        """
+        Claim the speculative tool call if it matches what the router picked.
+
+        Args:
+            tool_name: Tool chosen by the router
+            tool_input: Parameters chosen by the router
+
+        Returns:
+            The running task, or None if nothing matching was speculated
+        """
+        if "tool" not in self.tasks or not same_tool_call(self.tool_call, (tool_name, tool_input)):
+            return None
+        return self._take("tool")
+
+    def take_answer(self) -> Optional[asyncio.Task]:
+        """Claim the speculative direct answer, if one was started."""
+        if "answer" not in self.tasks:
+            return None
+        return self._take("answer")
+
+    def cancel(self) -> None:
+        """Cancel any speculative work the router did not use."""
+        for kind, task in self.tasks.items():
+            metrics.increment(f"speculation.{kind}.misses")
+            if task.done():
+                # Retrieve the exception so asyncio doesn't warn about it
+                if not task.cancelled():
+                    task.exception()
+            else:
+                task.cancel()
+        self.tasks.clear()
+
+# Budgets shared by all requests in this process
+tool_budget = SpeculationBudget(settings.SPECULATION_TOOL_BUDGET_PER_MINUTE)
+answer_budget = SpeculationBudget(settings.SPECULATION_ANSWER_BUDGET_PER_MINUTE)
@@ -0,0 +1,193 @@
+import difflib
+import os
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from config import settings
+from app.metrics import metrics
+from app.utils.text_index import SortedKeyIndex, normalize_text
+
+SYMBOLS_PATH = os.path.join(os.path.dirname(__file__), "data", "symbols.tsv")
+
+# Corporate suffixes dropped so "Microsoft" matches "Microsoft Corporation"
+NAME_SUFFIXES = re.compile(
+    r"\b(?:inc|corp|corporation|co|company|companies|ltd|plc|sa|se|nv|group|holding|holdings|"
+    r"class [a-c]|the)\b"
+)
+
+# Longest company name or alias, in words, tried when scanning free text
+MAX_NAME_WORDS = 5
+
+# Input written like a ticker ("UPST", "BRK.B"); if unlisted it's taken to be a
+# symbol missing from the listing, not a misspelled company name
+TICKER_SHAPE = re.compile(r"^[A-Z0-9]{1,5}(?:\.[A-Z])?$")
+
+# Shortest single-word name tried with fuzzy matching; shorter words are
+# too close to unrelated tickers and names ("upst" -> UPS)
+MIN_FUZZY_LENGTH = 6
+
+def strip_suffixes(name: str) -> str:
+    """Drop corporate suffixes from a normalized company name."""
+    return " ".join(NAME_SUFFIXES.sub(" ", name).split())
+
+class SymbolIndex:
+    """
+    Offline index of listed ticker symbols and the company names behind them.
+
+    Loaded from a bundled listing into a `SortedKeyIndex` of normalized
+    names and aliases, so "Microsoft", "microsoft corp" and "MSFT" all
+    resolve to MSFT without a network call, near misses like "Microsfot"
+    resolve through fuzzy matching, and tickers that aren't listed can be
+    rejected before spending an API call on them.
+    """
+
+    def __init__(self, path: str = SYMBOLS_PATH, fuzzy_cutoff: float = 0.85):
+        """
+        Load the listing.
+
+        Args:
+            path: TSV with symbol, name, exchange and pipe-separated aliases columns
+            fuzzy_cutoff: Minimum similarity (0-1) for a fuzzy name match
+        """
+        self.symbols: List[str] = []
+        self.names: List[str] = []
+        self.exchanges: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.fuzzy_cutoff = fuzzy_cutoff
+
+        keys = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                symbol, name, exchange, aliases = line.rstrip("\n").split("\t")
+
+                position = len(self.symbols)
+                self.positions[symbol] = position
+                self.symbols.append(symbol)
+                self.names.append(name)
+                self.exchanges.append(exchange)
+
+                normalized = normalize_text(name)
+                names = {normalized, strip_suffixes(normalized)}
+                names.update(normalize_text(alias) for alias in aliases.split("|") if alias)
+                keys.extend((key, position) for key in names if key)
+
+        self.index = SortedKeyIndex(keys)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def is_listed(self, ticker: str) -> bool:
+        """Check whether a (sanitized, upper-case) ticker is in the listing."""
+        return ticker in self.positions
+
+    def get(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Get the listing entry for a ticker, or None if it isn't listed."""
+        position = self.positions.get(ticker)
+        return self._entry(position) if position is not None else None
+
+    def resolve(self, text: str) -> Optional[str]:
+        """
+        Resolve a ticker, company name or alias to a listed ticker.
+
+        Tries the text as a ticker, then as an exact name or alias (with and
+        without corporate suffixes), then the closest fuzzy name match.
+        Unlisted ticker-shaped input isn't matched to names, and only long
+        or multi-word names are matched fuzzily, so real symbols missing from
+        the listing aren't rewritten to a similar listed company.
+
+        Args:
+            text: A ticker ("msft"), company name ("Microsoft Corp") or alias
+
+        Returns:
+            The ticker, or None if nothing in the listing matches
+        """
+        ticker = re.sub(r"[^\w]", "", text).upper()
+        if ticker in self.positions:
+            return ticker
+        if TICKER_SHAPE.match(text.strip()):
+            return None
+
+        normalized = normalize_text(text)
+        if not normalized:
+            return None
+
+        for key in (normalized, strip_suffixes(normalized)):
+            positions = self.index.exact(key)
+            if positions:
+                return self.symbols[positions[0]]
+
+        if " " not in normalized and len(normalized) < MIN_FUZZY_LENGTH:
+            return None
+        matches = difflib.get_close_matches(normalized, self.index.keys, n=1, cutoff=self.fuzzy_cutoff)
+        if matches:
+            return self.symbols[self.index.exact(matches[0])[0]]
+        return None
+
+    def find_in_text(self, text: str) -> Optional[str]:
+        """
+        Find the first company name or alias mentioned in free text.
+
+        Only exact (normalized) names count, longest first, so "Bank of
+        America" wins over "America" and ordinary words aren't fuzzily
+        matched to companies.
+
+        Args:
+            text: Free text such as a user query
+
+        Returns:
+            The ticker of the first company mentioned, or None
+        """
+        found = self.find_name(normalize_text(text).split())
+        return found[0] if found else None
+
+    def find_name(self, words: List[str]) -> Optional[Tuple[str, int, int]]:
+        """
+        Find the first company name or alias in a list of normalized words.
+
+        Args:
+            words: Words of normalized text (see `normalize_text`)
+
+        Returns:
+            (ticker, start, end) with the name at words[start:end], or None
+        """
+        for start in range(len(words)):
+            for length in range(min(MAX_NAME_WORDS, len(words) - start), 0, -1):
+                positions = self.index.exact(" ".join(words[start:start + length]))
+                if positions:
+                    return self.symbols[positions[0]], start, start + length
+        return None
+
+    def _entry(self, position: int) -> Dict[str, Any]:
+        return {
+            "symbol": self.symbols[position],
+            "name": self.names[position],
+            "exchange": self.exchanges[position]
+        }
+
+# Create a global symbol index from the bundled listing
+symbol_index = SymbolIndex()
+
+def resolve_ticker(text: str) -> Optional[str]:
+    """
+    Resolve a ticker or company name to the ticker used for lookups and cache keys.
+
+    Args:
+        text: A ticker or company name as passed to a tool
+
+    Returns:
+        The listed ticker, the sanitized input if the symbol index is
+        disabled or unlisted tickers are allowed, or None if the ticker
+        should be rejected
+    """
+    sanitized = re.sub(r"[^\w]", "", text).upper()
+    if not settings.SYMBOL_INDEX_ENABLED:
+        return sanitized
+
+    resolved = symbol_index.resolve(text)
+    if resolved is not None:
+        metrics.increment("symbols.hits")
+        return resolved
+
+    metrics.increment("symbols.misses")
+    return None if settings.REJECT_UNLISTED_TICKERS else sanitized
@@ -1,24 +1,100 @@
-from typing import Dict, Optional
+import importlib
+import inspect
+import json
+import os
+from importlib import metadata
+from typing import Dict, Any, Optional
 from app.tools.base import Tool
-from app.tools.weather import WeatherTool
-from app.tools.stocks import StocksTool
 
-# Registry of available tools
-_TOOLS: Dict[str, Tool] = {
-    "weather": WeatherTool(),
-    "stocks": StocksTool()
-}
+# Third-party packages can register tools under this entry point group,
+# e.g. `entry_points={"askwiseai.tools": ["crypto = mypkg.crypto:CryptoTool"]}`
+ENTRY_POINT_GROUP = "askwiseai.tools"
+
+# Bundled manifest with each tool's import target and metadata, so listing
+# tools doesn't import their modules (regenerate with scripts/build_tool_manifest.py)
+MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "manifest.json")
+
+# Registry of instantiated tools, filled on first use
+_TOOLS: Dict[str, Tool] = {}
+
+# Tool class -> whether its `execute` takes a `deadline` keyword
+_ACCEPTS_DEADLINE: Dict[type, bool] = {}
+
+# Tool name -> {"target": "module:Class", "description": ..., "parameters": ...}
+_MANIFEST: Optional[Dict[str, Dict[str, Any]]] = None
+
+def _discover() -> Dict[str, Dict[str, Any]]:
+    """Load the bundled manifest and add tools registered via entry points."""
+    global _MANIFEST
+    if _MANIFEST is not None:
+        return _MANIFEST
+    
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        group = entry_points.select(group=ENTRY_POINT_GROUP)
+    else:  # Python < 3.10
+        group = entry_points.get(ENTRY_POINT_GROUP, [])
+    
+    for entry_point in group:
+        if entry_point.name not in manifest:
+            manifest[entry_point.name] = {"target": entry_point.value}
+    
+    _MANIFEST = manifest
+    return _MANIFEST
+
+def _load(name: str, target: str) -> Tool:
+    """Import and instantiate a tool from a `module:Class` target."""
+    module_name, _, class_name = target.partition(":")
+    tool_class = getattr(importlib.import_module(module_name), class_name)
+    tool = tool_class()
+    accepts_deadline(tool)
+    _TOOLS[name] = tool
+    return tool
+
+def accepts_deadline(tool: Tool) -> bool:
+    """
+    Check whether a tool's `execute` takes the router's `deadline` keyword.
+    
+    Plugin tools written before deadlines existed don't, and are called
+    without one. The signature is inspected once per tool class.
+    """
+    accepts = _ACCEPTS_DEADLINE.get(type(tool))
+    if accepts is None:
+        parameters = inspect.signature(tool.execute).parameters.values()
+        accepts = any(
+            parameter.name == "deadline" or parameter.kind == inspect.Parameter.VAR_KEYWORD
+            for parameter in parameters
+        )
+        _ACCEPTS_DEADLINE[type(tool)] = accepts
+    return accepts
 
 def get_tool(name: str) -> Optional[Tool]:
-    """Get a tool by name."""
-    return _TOOLS.get(name)
+    """Get a tool by name, importing and instantiating it on first use."""
+    tool = _TOOLS.get(name)
+    if tool is not None:
+        return tool
+    
+    entry = _discover().get(name)
+    if entry is None:
+        return None
+    
+    return _load(name, entry["target"])
 
 def list_tools() -> Dict[str, Dict]:
     """List all available tools with their descriptions and parameters."""
-    return {
-        name: {
-            "description": tool.description,
-            "parameters": tool.parameters
+    tools = {}
+    for name, entry in _discover().items():
+        if "description" not in entry:
+            # Plugins without manifest metadata have to be imported once
+            tool = get_tool(name)
+            entry["description"] = tool.description
+            entry["parameters"] = tool.parameters
+        
+        tools[name] = {
+            "description": entry["description"],
+            "parameters": entry["parameters"]
         }
-        for name, tool in _TOOLS.items()
-    } 
\ No newline at end of file
+    return tools
@@ -1,5 +1,28 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+import hashlib
+from config import settings
+from app.cache import tool_cache
+from app.metrics import metrics
+
+# Error classes tools attach to failed results as "error_type"
+ERROR_NOT_FOUND = "not_found"  # The upstream has no data for this input
+ERROR_TRANSIENT = "transient"  # The upstream failed; retrying later may work
+
+def pick_template(templates: List[str], seed: str) -> str:
+    """
+    Pick a phrasing variant deterministically so the same query always
+    gets the same wording.
+    
+    Args:
+        templates: Candidate templates
+        seed: Text used to choose the variant (usually the user query)
+        
+    Returns:
+        One of the templates
+    """
+    digest = hashlib.md5(seed.encode('utf-8')).hexdigest()
+    return templates[int(digest, 16) % len(templates)]
 
 class Tool(ABC):
     """Base class for all tools."""
@@ -24,5 +47,114 @@ class Tool(ABC):
     
     @abstractmethod
     async def execute(self, **kwargs) -> Any:
-        """Execute the tool with the given parameters."""
-        pass 
\ No newline at end of file
+        """
+        Execute the tool with the given parameters.
+        
+        If the signature accepts a `deadline` keyword (or `**kwargs`), the
+        router passes an `app.deadline.Deadline` when the request has a time
+        budget; upstream calls should cap their timeout with it.
+        """
+        pass
+    
+    def render(self, output: Dict[str, Any], query: str) -> Optional[str]:
+        """
+        Render a tool result as a user-facing answer without calling the LLM.
+        
+        Args:
+            output: The result returned by `execute`
+            query: The user's query (used to pick a phrasing variant)
+            
+        Returns:
+            The rendered answer, or None if the tool has no template for this
+            output and the router should fall back to LLM synthesis
+        """
+        return None
+    
+    def lookup_key(self, tool_input: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the sanitized lookup key a call with these parameters uses.
+        
+        This is the key recorded in the popularity tracker and passed to `refresh`.
+        
+        Args:
+            tool_input: Parameters as passed to `execute`
+            
+        Returns:
+            The lookup key, or None if the tool doesn't cache or the input is invalid
+        """
+        return None
+    
+    def result_cache_key(self, tool_input: Dict[str, Any]) -> Optional[str]:
+        """
+        Get the `tool_cache` key that a call with these parameters reads and writes.
+        
+        Lets callers refer to a cached result instead of storing a copy of it.
+        
+        Args:
+            tool_input: Parameters as passed to `execute`
+            
+        Returns:
+            The cache key, or None if the tool doesn't cache or the input is invalid
+        """
+        key = self.lookup_key(tool_input)
+        return self.cache_key(key) if key else None
+    
+    def cache_key(self, key: str) -> str:
+        """Build the `tool_cache` key for a sanitized lookup key."""
+        return f"{self.name}:{key}"
+    
+    def cached_result(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a cached result for a lookup key, counting negative (error) hits.
+        
+        Args:
+            key: Sanitized lookup key
+            
+        Returns:
+            The cached result (possibly a cached error), or None on a miss
+        """
+        result = tool_cache.get(self.cache_key(key))
+        if result is not None and "error" in result:
+            metrics.increment(f"tool.{self.name}.negative_hits")
+        return result
+    
+    def cache_error(self, key: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Negatively cache a failed result so repeated bad lookups don't hit the upstream.
+        
+        Not-found errors are cached longer than transient upstream failures.
+        
+        Args:
+            key: Sanitized lookup key
+            result: The error result, with an "error_type" of ERROR_NOT_FOUND or ERROR_TRANSIENT
+            
+        Returns:
+            The same result
+        """
+        if not settings.NEGATIVE_CACHE_ENABLED:
+            return result
+        
+        error_type = result.get("error_type", ERROR_TRANSIENT)
+        if error_type == ERROR_NOT_FOUND:
+            ttl = settings.NEGATIVE_CACHE_NOT_FOUND_TTL
+        else:
+            ttl = settings.NEGATIVE_CACHE_TRANSIENT_TTL
+        
+        if ttl > 0:
+            tool_cache.set(self.cache_key(key), result, ttl=ttl)
+            metrics.increment(f"tool.{self.name}.negative_cached.{error_type}")
+        return result
+    
+    async def refresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a fresh result for a lookup key and store it in the cache.
+        
+        Used by the cache warmer; tools that don't support warming return None.
+        
+        Args:
+            key: Sanitized lookup key, as recorded in the popularity tracker
+            
+        Returns:
+            The fresh result, or None if the tool can't be warmed
+        """
+        return None
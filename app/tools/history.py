@@ -0,0 +1,251 @@
+import asyncio
+import time
+from functools import reduce
+from typing import Dict, Any, Optional
+import httpx
+import numpy as np
+from app.tools.base import Tool, ERROR_NOT_FOUND, ERROR_TRANSIENT
+from config import settings
+from app.deadline import Deadline, hop_timeout
+from app.metrics import metrics
+from app.price_store import price_store
+from app.symbols import resolve_ticker
+
+# Used to annualize the standard deviation of daily returns
+TRADING_DAYS_PER_YEAR = 252
+
+# Most tickers compared in one call
+MAX_TICKERS = 10
+
+def window_stats(series: Dict[str, Dict[str, np.ndarray]], days: int) -> Dict[str, Any]:
+    """
+    Compute price statistics for several tickers over their last `days` common trading days.
+
+    Closes are aligned on the dates every ticker traded and stacked into one
+    (days + 1) x tickers matrix, so each statistic is a single vectorized
+    operation across all tickers.
+
+    Args:
+        series: Ticker -> stored series (see `PriceStore.get`)
+        days: Number of trading days to look back
+
+    Returns:
+        The window bounds, per-ticker statistics and a ranking by return,
+        or an error if the tickers share fewer than two trading days
+    """
+    dates = reduce(np.intersect1d, [columns["dates"] for columns in series.values()])[-(days + 1):]
+    if len(dates) < 2:
+        return {"error": "Not enough price history to compute statistics.", "error_type": ERROR_NOT_FOUND}
+
+    tickers = list(series)
+    closes = np.column_stack([
+        np.asarray(columns["close"])[np.searchsorted(columns["dates"], dates)]
+        for columns in series.values()
+    ])
+
+    returns = (closes[-1] / closes[0] - 1) * 100
+    daily_log_returns = np.diff(np.log(closes), axis=0)
+    if len(daily_log_returns) > 1:
+        volatility = daily_log_returns.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100
+    else:
+        volatility = np.zeros(len(tickers))
+    averages = closes.mean(axis=0)
+    highs = closes.max(axis=0)
+    lows = closes.min(axis=0)
+
+    stats = {
+        ticker: {
+            "start_close": round(float(closes[0, i]), 2),
+            "latest_close": round(float(closes[-1, i]), 2),
+            "return_percent": round(float(returns[i]), 2),
+            "average_close": round(float(averages[i]), 2),
+            "high": round(float(highs[i]), 2),
+            "low": round(float(lows[i]), 2),
+            "volatility_percent": round(float(volatility[i]), 2)
+        }
+        for i, ticker in enumerate(tickers)
+    }
+
+    result = {
+        "days": len(dates) - 1,
+        "start_date": str(dates[0]),
+        "end_date": str(dates[-1]),
+        "tickers": stats,
+        "ranking": [tickers[i] for i in np.argsort(-returns)]
+    }
+    if len(tickers) > 1:
+        result["biggest_mover"] = tickers[int(np.argmax(np.abs(returns)))]
+    return result
+
+class PriceHistoryTool(Tool):
+    """Historical price statistics computed locally from stored daily series."""
+
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._checked_at: Dict[str, float] = {}
+
+    @property
+    def name(self) -> str:
+        return "price_history"
+
+    @property
+    def description(self) -> str:
+        return (
+            "Get historical stock performance over a period: return, average close, high/low and "
+            "volatility, and which of several stocks moved the most. Use this for questions about "
+            "trends or performance over time (e.g. the last week or month), not for the current price."
+        )
+
+    @property
+    def parameters(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "tickers": {
+                "type": "string",
+                "description": "Comma-separated ticker symbols or company names (e.g., 'AAPL' or 'AAPL, MSFT, NVDA'), "
+                               f"at most {MAX_TICKERS}"
+            },
+            "days": {
+                "type": "integer",
+                "description": "Number of trading days to look back (5 = one week, 21 = one month, 63 = three months)"
+            }
+        }
+
+    async def execute(self, tickers: str = "", days: int = 21, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Compute price statistics for the given tickers over the last `days` trading days."""
+        try:
+            days = max(1, int(days))
+        except (TypeError, ValueError):
+            return {"error": "Invalid number of days. Please provide a whole number of trading days."}
+
+        names = [name.strip() for name in str(tickers or "").split(",") if name.strip()]
+        if not names:
+            return {"error": "No stocks given. Please name the stocks to look up (e.g. 'AAPL, MSFT')."}
+
+        resolved = []
+        for name in names:
+            ticker = resolve_ticker(name)
+            if ticker is None:
+                return {"error": f"Unknown ticker symbol {name}. Please check if the ticker symbol is correct.",
+                        "error_type": ERROR_NOT_FOUND}
+            if ticker not in resolved:
+                resolved.append(ticker)
+        if len(resolved) > MAX_TICKERS:
+            return {"error": f"Too many stocks ({len(resolved)}). Please compare at most {MAX_TICKERS} at a time."}
+
+        errors = await asyncio.gather(*(self._ensure(ticker, deadline) for ticker in resolved))
+        for error in errors:
+            if error is not None:
+                return error
+
+        with metrics.timer("history.compute_ms"):
+            return window_stats({ticker: price_store.get(ticker) for ticker in resolved}, days)
+
+    async def _ensure(self, ticker: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Make sure a ticker's stored series is recent, fetching new rows if needed; return an error or None."""
+        cached_error = self.cached_result(ticker)
+        if cached_error is not None:
+            # Serve the stored series, if any, without retrying until the failure expires
+            return cached_error if price_store.get(ticker) is None else None
+
+        lock = self._locks.setdefault(ticker, asyncio.Lock())
+        async with lock:
+            checked_at = self._checked_at.get(ticker)
+            if checked_at is not None and time.time() - checked_at < settings.PRICE_HISTORY_REFRESH_SECONDS:
+                return None
+
+            error = await self._fetch(ticker, deadline)
+            if error is not None and price_store.get(ticker) is not None:
+                # Serve the stored (slightly stale) series rather than failing
+                print(f"Using stored price history for {ticker}: {error['error']}")
+                return None
+            return error
+
+    async def _fetch(self, ticker: str, deadline: Optional[Deadline] = None) -> Optional[Dict[str, Any]]:
+        """Fetch a ticker's daily series and append rows newer than the stored ones; return an error or None."""
+        timeout = hop_timeout(deadline, 10.0)
+
+        try:
+            async with httpx.AsyncClient() as client:
+                response = await client.get(
+                    "https://www.alphavantage.co/query",
+                    params={
+                        "function": "TIME_SERIES_DAILY",
+                        "symbol": ticker,
+                        "outputsize": settings.PRICE_HISTORY_OUTPUT_SIZE,
+                        "apikey": settings.ALPHA_VANTAGE_API_KEY
+                    },
+                    timeout=timeout
+                )
+
+                if response.status_code != 200:
+                    return self.cache_error(ticker, {
+                        "error": f"Stock API error: {response.status_code}",
+                        "error_type": ERROR_TRANSIENT
+                    })
+
+                data = response.json()
+
+                # Rate limit notices come back as 200s without a series
+                if "Note" in data or "Information" in data:
+                    return self.cache_error(ticker, {
+                        "error": "Stock API rate limit reached. Please try again shortly.",
+                        "error_type": ERROR_TRANSIENT
+                    })
+
+                rows = data.get("Time Series (Daily)")
+                if not rows:
+                    return self.cache_error(ticker, {
+                        "error": f"No price history found for ticker {ticker}. Please check if the ticker symbol is correct.",
+                        "error_type": ERROR_NOT_FOUND
+                    })
+
+                dates = list(rows)
+                added = price_store.append(
+                    ticker,
+                    dates=dates,
+                    close=[float(rows[date]["4. close"]) for date in dates],
+                    volume=[int(float(rows[date]["5. volume"])) for date in dates]
+                )
+                self._checked_at[ticker] = time.time()
+                metrics.increment("history.fetches")
+                metrics.increment("history.rows_appended", added)
+                return None
+
+        except httpx.RequestError as e:
+            result = {"error": f"Failed to connect to stock service: {str(e)}", "error_type": ERROR_TRANSIENT}
+            # A timeout cut short by this request's deadline says nothing about the upstream
+            if isinstance(e, httpx.TimeoutException) and timeout < 10.0:
+                return result
+            return self.cache_error(ticker, result)
+        except Exception as e:
+            return self.cache_error(ticker, {
+                "error": f"Unexpected error getting price history: {str(e)}",
+                "error_type": ERROR_TRANSIENT
+            })
+
+    def render(self, output: Dict[str, Any], query: str) -> Optional[str]:
+        """Render price statistics as a short summary."""
+        if "error" in output:
+            return None
+
+        try:
+            period = f"the last {output['days']} trading days ({output['start_date']} to {output['end_date']})"
+            stats = output["tickers"]
+            if len(stats) == 1:
+                ticker, s = next(iter(stats.items()))
+                direction = "rose" if s["return_percent"] > 0 else "fell" if s["return_percent"] < 0 else "was unchanged"
+                change = f" {abs(s['return_percent']):.2f}%" if s["return_percent"] else ""
+                return (
+                    f"Over {period}, {ticker} {direction}{change} from ${s['start_close']:.2f} to "
+                    f"${s['latest_close']:.2f}. Its average close was ${s['average_close']:.2f}, with a range of "
+                    f"${s['low']:.2f}-${s['high']:.2f} and annualized volatility of {s['volatility_percent']:.1f}%."
+                )
+
+            mover = output["biggest_mover"]
+            others = ", ".join(f"{ticker} {stats[ticker]['return_percent']:+.2f}%" for ticker in output["ranking"])
+            return (
+                f"{mover} was the biggest mover over {period}, at {stats[mover]['return_percent']:+.2f}%. "
+                f"Returns by ticker: {others}."
+            )
+        except (KeyError, TypeError, StopIteration):
+            return None
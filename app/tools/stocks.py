@@ -1,9 +1,26 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import re
-from app.tools.base import Tool
+from app.tools.base import Tool, pick_template, ERROR_NOT_FOUND, ERROR_TRANSIENT
 from config import settings
 from app.cache import tool_cache
+from app.deadline import Deadline, hop_timeout
+from app.symbols import resolve_ticker
+from app.metrics import metrics
+
+# Phrasing variants for templated answers
+RESPONSE_TEMPLATES = [
+    "{ticker} is trading at ${price}, {direction} {change} ({change_percent}) "
+    "as of {latest_trading_day}.",
+    "As of {latest_trading_day}, {ticker} stands at ${price}, {direction} {change} "
+    "({change_percent}) on volume of {volume} shares.",
+    "The latest price for {ticker} is ${price} ({direction} {change}, {change_percent}) "
+    "as of {latest_trading_day}."
+]
+
+def sanitize_ticker(ticker: str) -> str:
+    """Only allow alphanumeric chars, upper-cased."""
+    return re.sub(r'[^\w]', '', ticker).upper()
 
 class StocksTool(Tool):
     @property
@@ -19,27 +36,57 @@ class StocksTool(Tool):
         return {
             "ticker": {
                 "type": "string",
-                "description": "The stock ticker symbol (e.g., 'AAPL' for Apple, 'MSFT' for Microsoft, 'GOOG' for Google)"
+                "description": "The stock ticker symbol (e.g., 'AAPL' for Apple, 'MSFT' for Microsoft, 'GOOG' for Google) or company name"
             }
         }
     
-    async def execute(self, ticker: str) -> Dict[str, Any]:
+    async def execute(self, ticker: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Get current stock price for the specified ticker."""
         # Input validation
         if not ticker or not isinstance(ticker, str):
             return {"error": "Invalid ticker symbol. Please provide a valid stock ticker."}
         
         # Sanitize input - only allow alphanumeric chars
-        sanitized_ticker = re.sub(r'[^\w]', '', ticker).upper()
+        sanitized_ticker = sanitize_ticker(ticker)
         if sanitized_ticker != ticker.upper():
             print(f"Sanitized ticker from '{ticker}' to '{sanitized_ticker}'")
         
-        # Check cache first
-        cache_key = f"stocks:{sanitized_ticker}"
-        cached_result = tool_cache.get(cache_key)
+        # Resolve company names (and reject unknown symbols without an API call, if configured)
+        resolved_ticker = self.canonical_ticker(ticker)
+        if resolved_ticker is None:
+            metrics.increment("stocks.rejected_tickers")
+            return {
+                "error": f"Unknown ticker symbol {sanitized_ticker}. Please check if the ticker symbol is correct.",
+                "error_type": ERROR_NOT_FOUND
+            }
+        
+        # Check cache first (including recently failed lookups)
+        cached_result = self.cached_result(resolved_ticker)
         if cached_result is not None:
             return cached_result
         
+        return await self._fetch(resolved_ticker, deadline)
+    
+    def canonical_ticker(self, ticker: str) -> Optional[str]:
+        """Resolve a ticker or company name; None if it should be rejected (see `resolve_ticker`)."""
+        return resolve_ticker(ticker)
+    
+    def lookup_key(self, tool_input: Dict[str, Any]) -> Optional[str]:
+        ticker = tool_input.get("ticker")
+        if not ticker or not isinstance(ticker, str):
+            return None
+        return self.canonical_ticker(ticker)
+    
+    async def refresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch fresh data for a cached ticker (used by the cache warmer)."""
+        result = await self._fetch(key)
+        return None if "error" in result else result
+    
+    async def _fetch(self, sanitized_ticker: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Call the upstream API and cache the result, negatively if it failed."""
+        cache_key = self.cache_key(sanitized_ticker)
+        timeout = hop_timeout(deadline, 10.0)
+        
         # Proceed with API call
         api_key = settings.ALPHA_VANTAGE_API_KEY
         
@@ -52,16 +99,29 @@ class StocksTool(Tool):
                         "symbol": sanitized_ticker,
                         "apikey": api_key
                     },
-                    timeout=10.0  # Add timeout
+                    timeout=timeout
                 )
                 
                 if response.status_code != 200:
-                    return {"error": f"Stock API error: {response.status_code}"}
+                    return self.cache_error(sanitized_ticker, {
+                        "error": f"Stock API error: {response.status_code}",
+                        "error_type": ERROR_TRANSIENT
+                    })
                 
                 data = response.json()
                 
+                # Rate limit notices come back as 200s without a quote
+                if "Note" in data or "Information" in data:
+                    return self.cache_error(sanitized_ticker, {
+                        "error": "Stock API rate limit reached. Please try again shortly.",
+                        "error_type": ERROR_TRANSIENT
+                    })
+                
                 if "Global Quote" not in data or not data["Global Quote"]:
-                    return {"error": f"No data found for ticker {sanitized_ticker}. Please check if the ticker symbol is correct."}
+                    return self.cache_error(sanitized_ticker, {
+                        "error": f"No data found for ticker {sanitized_ticker}. Please check if the ticker symbol is correct.",
+                        "error_type": ERROR_NOT_FOUND
+                    })
                 
                 quote = data["Global Quote"]
                 
@@ -80,6 +140,38 @@ class StocksTool(Tool):
                 return result
                 
         except httpx.RequestError as e:
-            return {"error": f"Failed to connect to stock service: {str(e)}"}
+            result = {"error": f"Failed to connect to stock service: {str(e)}", "error_type": ERROR_TRANSIENT}
+            # A timeout cut short by this request's deadline says nothing about the upstream
+            if isinstance(e, httpx.TimeoutException) and timeout < 10.0:
+                return result
+            return self.cache_error(sanitized_ticker, result)
         except Exception as e:
-            return {"error": f"Unexpected error getting stock data: {str(e)}"} 
\ No newline at end of file
+            return self.cache_error(sanitized_ticker, {
+                "error": f"Unexpected error getting stock data: {str(e)}",
+                "error_type": ERROR_TRANSIENT
+            })
+    
+    def render(self, output: Dict[str, Any], query: str) -> Optional[str]:
+        """Render a stock quote as a short sentence."""
+        if "error" in output:
+            return None
+        
+        try:
+            change = float(output["change"])
+            price = float(output["price"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        
+        direction = "up" if change > 0 else "down" if change < 0 else "unchanged by"
+        change_percent = str(output.get("change_percent", "")).lstrip("+-")
+        
+        template = pick_template(RESPONSE_TEMPLATES, query)
+        return template.format(
+            ticker=output.get("ticker", ""),
+            price=f"{price:.2f}",
+            direction=direction,
+            change=f"{abs(change):.2f}",
+            change_percent=change_percent,
+            volume=output.get("volume", "N/A"),
+            latest_trading_day=output.get("latest_trading_day", "N/A")
+        )
@@ -1,9 +1,26 @@
 import httpx
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import re
-from app.tools.base import Tool
+from app.tools.base import Tool, pick_template, ERROR_NOT_FOUND, ERROR_TRANSIENT
 from config import settings
 from app.cache import tool_cache
+from app.deadline import Deadline, hop_timeout
+from app.gazetteer import gazetteer
+from app.metrics import metrics
+
+# Phrasing variants for templated answers
+RESPONSE_TEMPLATES = [
+    "It's currently {condition} and {temperature_c}°C ({temperature_f}°F) in {location}, "
+    "with {humidity}% humidity and winds of {wind_kph} km/h.",
+    "Right now in {location} it's {temperature_c}°C ({temperature_f}°F) and {condition}. "
+    "Humidity is {humidity}% and the wind is blowing at {wind_kph} km/h.",
+    "The current weather in {location} is {condition} with a temperature of "
+    "{temperature_c}°C ({temperature_f}°F), {humidity}% humidity and {wind_kph} km/h winds."
+]
+
+def sanitize_location(location: str) -> str:
+    """Only allow alphanumeric chars, spaces, and commas."""
+    return re.sub(r'[^\w\s,]', '', location)
 
 class WeatherTool(Tool):
     @property
@@ -23,23 +40,63 @@ class WeatherTool(Tool):
             }
         }
     
-    async def execute(self, location: str) -> Dict[str, Any]:
+    async def execute(self, location: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
         """Get current weather for the specified location."""
         # Input validation
         if not location or not isinstance(location, str):
             return {"error": "Invalid location. Please provide a valid city name."}
         
         # Sanitize input - only allow alphanumeric chars, spaces, and commas
-        sanitized_location = re.sub(r'[^\w\s,]', '', location)
+        sanitized_location = sanitize_location(location)
         if sanitized_location != location:
             print(f"Sanitized location from '{location}' to '{sanitized_location}'")
         
-        # Check cache first
-        cache_key = f"weather:{sanitized_location}"
-        cached_result = tool_cache.get(cache_key)
+        key = self.canonical_key(sanitized_location)
+        if settings.GAZETTEER_ENABLED:
+            metrics.increment("gazetteer.hits" if gazetteer.get(key) else "gazetteer.misses")
+        
+        # Check cache first (including recently failed lookups)
+        cached_result = self.cached_result(key)
         if cached_result is not None:
             return cached_result
         
+        return await self._fetch(key, deadline)
+    
+    def canonical_key(self, sanitized_location: str) -> str:
+        """
+        Get the lookup key for a location.
+        
+        Locations found in the offline gazetteer are keyed by place ID, so
+        "NYC" and "New York, US" share one cache entry; anything else is
+        keyed by the sanitized text. Place IDs contain hyphens, which
+        sanitizing strips, so the two kinds of key can't collide.
+        """
+        if settings.GAZETTEER_ENABLED:
+            place = gazetteer.resolve(sanitized_location)
+            if place is not None:
+                return place["id"]
+        return sanitized_location
+    
+    def lookup_key(self, tool_input: Dict[str, Any]) -> Optional[str]:
+        location = tool_input.get("location")
+        if not location or not isinstance(location, str):
+            return None
+        return self.canonical_key(sanitize_location(location))
+    
+    async def refresh(self, key: str) -> Optional[Dict[str, Any]]:
+        """Fetch fresh data for a cached location (used by the cache warmer)."""
+        result = await self._fetch(key)
+        return None if "error" in result else result
+    
+    async def _fetch(self, key: str, deadline: Optional[Deadline] = None) -> Dict[str, Any]:
+        """Call the upstream API and cache the result, negatively if it failed."""
+        cache_key = self.cache_key(key)
+        timeout = hop_timeout(deadline, 10.0)
+        
+        # Known places are looked up by coordinates, which the API never misreads
+        place = gazetteer.get(key)
+        query = f"{place['lat']},{place['lon']}" if place else key
+        
         # Proceed with API call
         api_key = settings.WEATHER_API_KEY
         
@@ -49,10 +106,10 @@ class WeatherTool(Tool):
                     f"https://api.weatherapi.com/v1/current.json",
                     params={
                         "key": api_key,
-                        "q": sanitized_location,
+                        "q": query,
                         "aqi": "no"
                     },
-                    timeout=10.0  # Add timeout
+                    timeout=timeout
                 )
                 
                 if response.status_code != 200:
@@ -63,12 +120,19 @@ class WeatherTool(Tool):
                             error_msg = f"Weather API error: {error_data['error']['message']}"
                     except:
                         pass
-                    return {"error": error_msg}
+                    # 400 means the location wasn't found; anything else is an upstream problem
+                    error_type = ERROR_NOT_FOUND if response.status_code == 400 else ERROR_TRANSIENT
+                    return self.cache_error(key, {"error": error_msg, "error_type": error_type})
                 
                 data = response.json()
                 
+                if place:
+                    location = f"{place['name']}, {place['country']}"
+                else:
+                    location = f"{data['location']['name']}, {data['location']['country']}"
+                
                 result = {
-                    "location": f"{data['location']['name']}, {data['location']['country']}",
+                    "location": location,
                     "temperature_c": data['current']['temp_c'],
                     "temperature_f": data['current']['temp_f'],
                     "condition": data['current']['condition']['text'],
@@ -83,6 +147,31 @@ class WeatherTool(Tool):
                 return result
                 
         except httpx.RequestError as e:
-            return {"error": f"Failed to connect to weather service: {str(e)}"}
+            result = {"error": f"Failed to connect to weather service: {str(e)}", "error_type": ERROR_TRANSIENT}
+            # A timeout cut short by this request's deadline says nothing about the upstream
+            if isinstance(e, httpx.TimeoutException) and timeout < 10.0:
+                return result
+            return self.cache_error(key, result)
         except Exception as e:
-            return {"error": f"Unexpected error getting weather data: {str(e)}"} 
\ No newline at end of file
+            return self.cache_error(key, {
+                "error": f"Unexpected error getting weather data: {str(e)}",
+                "error_type": ERROR_TRANSIENT
+            })
+    
+    def render(self, output: Dict[str, Any], query: str) -> Optional[str]:
+        """Render a weather result as a short sentence."""
+        if "error" in output:
+            return None
+        
+        try:
+            template = pick_template(RESPONSE_TEMPLATES, query)
+            return template.format(
+                location=output["location"],
+                condition=str(output["condition"]).lower(),
+                temperature_c=output["temperature_c"],
+                temperature_f=output["temperature_f"],
+                humidity=output["humidity"],
+                wind_kph=output["wind_kph"]
+            )
+        except KeyError:
+            return None
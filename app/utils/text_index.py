@@ -0,0 +1,69 @@
+import bisect
+import re
+import unicodedata
+from array import array
+from typing import Iterable, List, Tuple
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize free text for index lookups.
+
+    Lowercases, strips accents, turns punctuation into spaces and collapses
+    whitespace, so "São Paulo", "sao paulo" and "Sao-Paulo " all map to
+    "sao paulo".
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+class SortedKeyIndex:
+    """
+    Read-only string → integer index backed by two parallel sorted arrays.
+
+    Keys are kept in one sorted list with their values in a compact
+    `array`, so exact and prefix lookups are binary searches and the whole
+    index costs little more than the key strings themselves. A key may map
+    to several values (e.g. "portland" → two places).
+    """
+
+    def __init__(self, items: Iterable[Tuple[str, int]]):
+        """
+        Build the index.
+
+        Args:
+            items: (key, value) pairs; keys are used as given (normalize them first)
+        """
+        pairs = sorted(set(items))
+        self.keys: List[str] = [key for key, _ in pairs]
+        self.values = array("I", (value for _, value in pairs))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def exact(self, key: str) -> List[int]:
+        """Get every value stored under `key`."""
+        lo = bisect.bisect_left(self.keys, key)
+        hi = bisect.bisect_right(self.keys, key, lo)
+        return list(self.values[lo:hi])
+
+    def prefix(self, prefix: str, limit: int = 10) -> List[int]:
+        """
+        Get the distinct values of keys starting with `prefix`, in key order.
+
+        Args:
+            prefix: Key prefix
+            limit: Maximum number of values to return
+
+        Returns:
+            Up to `limit` values
+        """
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + "￿", lo)
+        found: List[int] = []
+        for value in self.values[lo:hi]:
+            if value not in found:
+                found.append(value)
+                if len(found) >= limit:
+                    break
+        return found
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+from config import settings
+from app.cache import tool_cache
+from app.metrics import metrics
+from app.popularity import popularity, PopularityTracker
+from app.tools import get_tool
+
+class CacheWarmer:
+    """Background task that refreshes popular tool results before they expire."""
+
+    def __init__(
+        self,
+        tracker: PopularityTracker,
+        top_k: int = 50,
+        refresh_ahead: float = 60,
+        max_refreshes_per_hour: int = 500,
+        min_score: float = 0.5
+    ):
+        """
+        Initialize the warmer.
+
+        Args:
+            tracker: Popularity tracker to pick keys from
+            top_k: Number of most popular keys to keep warm
+            refresh_ahead: Refresh entries that expire within this many seconds
+            max_refreshes_per_hour: Upstream quota the warmer may spend per hour
+            min_score: Decayed hit count below which a key is left to expire
+        """
+        self.tracker = tracker
+        self.top_k = top_k
+        self.refresh_ahead = refresh_ahead
+        self.max_refreshes_per_hour = max_refreshes_per_hour
+        self.min_score = min_score
+        self.refreshed_at: Deque[float] = deque()
+        self._task: Optional[asyncio.Task] = None
+
+    def _quota_left(self) -> int:
+        cutoff = time.time() - 3600
+        while self.refreshed_at and self.refreshed_at[0] < cutoff:
+            self.refreshed_at.popleft()
+        return self.max_refreshes_per_hour - len(self.refreshed_at)
+
+    async def warm_once(self) -> int:
+        """
+        Refresh popular entries that are still cached and about to expire.
+
+        Keys that were evicted, already expired or haven't been looked up
+        recently enough to reach `min_score` are left alone, so an idle
+        deployment doesn't spend upstream quota on keys nobody asks for.
+
+        Returns:
+            Number of entries refreshed
+        """
+        refreshed = 0
+        for tool_name, key in self.tracker.top_k(self.top_k):
+            tool = get_tool(tool_name)
+            if tool is None:
+                continue
+
+            if self.tracker.score(tool_name, key) < self.min_score:
+                metrics.increment("warmer.skipped_cold")
+                continue
+
+            remaining = tool_cache.ttl_remaining(tool.cache_key(key))
+            if remaining is None or remaining > self.refresh_ahead:
+                continue
+
+            # Don't spend upstream calls re-checking lookups that just failed
+            cached = tool_cache.peek(tool.cache_key(key))
+            if cached is not None and "error" in cached:
+                metrics.increment("warmer.skipped_negative")
+                continue
+
+            if self._quota_left() <= 0:
+                metrics.increment("warmer.skipped_quota")
+                break
+
+            self.refreshed_at.append(time.time())
+            try:
+                result = await tool.refresh(key)
+            except Exception as e:
+                print(f"Cache warmer failed to refresh {tool_name}:{key}: {str(e)}")
+                metrics.increment("warmer.errors")
+                continue
+
+            if result is not None:
+                refreshed += 1
+                metrics.increment("warmer.refreshed")
+
+        return refreshed
+
+    async def run(self, interval: float) -> None:
+        """Refresh popular entries every `interval` seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                refreshed = await self.warm_once()
+                if refreshed:
+                    print(f"Cache warmer refreshed {refreshed} entries")
+            except Exception as e:
+                print(f"Cache warmer error: {str(e)}")
+
+    def start(self, interval: float) -> None:
+        """Start the background refresh loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(interval))
+
+    async def stop(self) -> None:
+        """Stop the background refresh loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# Create a global cache warmer
+cache_warmer = CacheWarmer(
+    popularity,
+    top_k=settings.WARMER_TOP_K,
+    refresh_ahead=settings.WARMER_REFRESH_AHEAD,
+    max_refreshes_per_hour=settings.WARMER_MAX_REFRESHES_PER_HOUR,
+    min_score=settings.POPULARITY_MIN_SCORE
+)
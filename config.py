@@ -1,4 +1,5 @@
 import os
+from typing import Dict
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,6 +11,91 @@ class Settings(BaseSettings):
     # LLM Settings
     DEFAULT_MODEL: str = "gpt-4"
     
+    # Model Cascade Settings (per-stage models; DEFAULT_MODEL is the escalation target)
+    MODEL_CASCADE_ENABLED: bool = True
+    ROUTING_MODEL: str = "gpt-4o-mini"
+    SYNTHESIS_MODEL: str = "gpt-4o-mini"
+    FALLBACK_MODEL: str = "gpt-4o-mini"
+    ANSWER_MODEL: str = "gpt-4"
+    CASCADE_MIN_CONFIDENCE: float = 0.6  # Routing decisions below this are escalated
+    
+    # Speculative Execution Settings
+    SPECULATION_ENABLED: bool = True  # Start a likely tool call while the router decides
+    SPECULATE_DIRECT_ANSWER: bool = False  # Also speculate the direct-answer LLM call
+    SPECULATION_TOOL_BUDGET_PER_MINUTE: int = 60
+    SPECULATION_ANSWER_BUDGET_PER_MINUTE: int = 20
+    
+    # Cache Warmer Settings
+    WARMER_ENABLED: bool = True
+    WARMER_INTERVAL: float = 30  # Seconds between warming passes
+    WARMER_TOP_K: int = 50  # Number of most popular tool keys kept warm
+    WARMER_REFRESH_AHEAD: float = 60  # Refresh entries expiring within this many seconds
+    WARMER_MAX_REFRESHES_PER_HOUR: int = 500  # Upstream quota the warmer may spend
+    POPULARITY_HALF_LIFE: float = 900  # Seconds for a lookup's weight to halve
+    POPULARITY_MIN_SCORE: float = 0.5  # Decayed hits below which a key is no longer kept warm
+    
+    # Job Queue Settings
+    JOB_WORKERS: int = 4  # Concurrent workers running submitted jobs
+    JOB_RESULT_TTL: int = 600  # Seconds to keep finished job results
+    JOB_MAX_QUEUE_SIZE: int = 1000  # Submissions beyond this are rejected with 503
+    JOB_MAX_AGE: int = 1800  # Queued or running jobs older than this are marked failed
+    
+    # Memory Settings
+    MEMORY_BUDGET_BYTES: int = 64 * 1024 * 1024  # Evict least recently active conversations beyond this
+    
+    # Deadline Settings (time budget shared by every LLM and tool call of a request)
+    REQUEST_DEADLINE_SECONDS: float = 25  # Under the 30 s gateway timeout
+    JOB_DEADLINE_SECONDS: float = 120  # Background jobs don't hold a connection open
+    
+    # Admission Control Settings
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_IN_FLIGHT: int = 64  # Reject /query requests beyond this with 429
+    ADMISSION_DEGRADE_IN_FLIGHT: int = 32  # Serve degraded responses beyond this
+    ADMISSION_DEGRADE_LATENCY_MS: float = 10000  # Degrade when recent p90 upstream latency exceeds this
+    ADMISSION_LATENCY_MAX_AGE: float = 60  # Seconds an upstream latency observation counts towards degrading
+    ADMISSION_RETRY_AFTER: int = 5  # Seconds sent in the Retry-After header
+    
+    # Location Settings
+    GAZETTEER_ENABLED: bool = True  # Canonicalize weather locations with the bundled offline gazetteer
+    
+    # Symbol Settings
+    SYMBOL_INDEX_ENABLED: bool = True  # Resolve company names and tickers with the bundled symbol listing
+    REJECT_UNLISTED_TICKERS: bool = False  # Skip the stock API call for tickers missing from the listing (needs a full listing)
+    
+    # Negative Cache Settings (failed tool lookups)
+    NEGATIVE_CACHE_ENABLED: bool = True
+    NEGATIVE_CACHE_NOT_FOUND_TTL: int = 600  # Unknown location or ticker
+    NEGATIVE_CACHE_TRANSIENT_TTL: int = 30  # Upstream errors, rate limits and timeouts
+    
+    # Price History Settings
+    PRICE_HISTORY_DIR: str = ""  # Persist daily series here (kept in memory only when empty)
+    PRICE_HISTORY_MMAP: bool = False  # Memory-map persisted series instead of loading them
+    PRICE_HISTORY_REFRESH_SECONDS: int = 21600  # Re-fetch a ticker's daily series at most this often
+    PRICE_HISTORY_OUTPUT_SIZE: str = "compact"  # "compact" (100 days) or "full" (20+ years)
+    
+    # Profiling Settings (CPU profiles of individual /query requests)
+    PROFILING_ENABLED: bool = False  # Allows X-Profile requests and the /admin/profil* endpoints
+    PROFILE_SAMPLE_RATE: float = 0.0  # Fraction of requests profiled without asking (adjustable at runtime)
+    PROFILE_BUFFER_SIZE: int = 20  # Number of recent profiles kept
+    
+    # Shared Cache Settings (cross-process tier for `uvicorn --workers N` on one host)
+    SHARED_CACHE_ENABLED: bool = False
+    SHARED_CACHE_DIR: str = "/dev/shm"  # tmpfs keeps the mapped files in memory
+    SHARED_CACHE_SLOTS: int = 4096  # Entries per cache
+    SHARED_CACHE_SLOT_BYTES: int = 8192  # Larger values stay process-local
+    
+    # USD per 1K tokens, used for per-stage cost accounting
+    MODEL_COSTS: Dict[str, Dict[str, float]] = {
+        "gpt-4": {"prompt": 0.03, "completion": 0.06},
+        "gpt-4o": {"prompt": 0.0025, "completion": 0.01},
+        "gpt-4o-mini": {"prompt": 0.00015, "completion": 0.0006},
+        "gpt-3.5-turbo": {"prompt": 0.0005, "completion": 0.0015}
+    }
+    
+    # Answer Synthesis Settings
+    TEMPLATED_TOOL_ANSWERS: bool = True  # Render simple tool lookups locally instead of calling the LLM
+    SIMPLE_LOOKUP_MAX_WORDS: int = 16  # Longer queries are treated as open-ended
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,60 @@
+"""
+Refresh app/data/symbols.tsv from Alpha Vantage's LISTING_STATUS endpoint.
+
+Keeps the aliases of symbols already in the file and adds every active
+stock and ETF listed on a US exchange, so ticker validation covers the
+whole market rather than just the bundled large caps:
+
+    ALPHA_VANTAGE_API_KEY=... python scripts/build_symbol_listing.py
+"""
+import csv
+import io
+import os
+import sys
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.symbols import SYMBOLS_PATH  # noqa: E402
+from app.tools.stocks import sanitize_ticker  # noqa: E402
+from config import settings  # noqa: E402
+
+HEADER = "# symbol\tname\texchange\taliases\n"
+
+def load_aliases() -> dict:
+    aliases = {}
+    with open(SYMBOLS_PATH, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                symbol, _, _, symbol_aliases = line.rstrip("\n").split("\t")
+                aliases[symbol] = symbol_aliases
+    return aliases
+
+def build_listing() -> list:
+    response = httpx.get(
+        "https://www.alphavantage.co/query",
+        params={"function": "LISTING_STATUS", "apikey": settings.ALPHA_VANTAGE_API_KEY},
+        timeout=60
+    )
+    response.raise_for_status()
+
+    aliases = load_aliases()
+    rows = {}
+    for row in csv.DictReader(io.StringIO(response.text)):
+        if row.get("status") != "Active":
+            continue
+        # Tool lookups use sanitized tickers, e.g. BRK-B -> BRKB
+        symbol = sanitize_ticker(row["symbol"])
+        name = " ".join(row["name"].split())
+        if symbol and name:
+            rows[symbol] = (symbol, name, row["exchange"], aliases.get(symbol, ""))
+    return sorted(rows.values())
+
+if __name__ == "__main__":
+    listing = build_listing()
+    with open(SYMBOLS_PATH, "w", encoding="utf-8") as f:
+        f.write(HEADER)
+        for row in listing:
+            f.write("\t".join(row) + "\n")
+    print(f"Wrote {len(listing)} symbols to {SYMBOLS_PATH}")
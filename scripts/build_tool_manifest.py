@@ -0,0 +1,32 @@
+"""
+Refresh the metadata in app/tools/manifest.json from the tool classes.
+
+To add a bundled tool, add an entry with just its import target, e.g.
+`"crypto": {"target": "app.tools.crypto:CryptoTool"}`, then run:
+
+    python scripts/build_tool_manifest.py
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.tools import MANIFEST_PATH, _load
+
+def build_manifest() -> dict:
+    with open(MANIFEST_PATH, encoding="utf-8") as f:
+        manifest = json.load(f)
+    
+    for name, entry in manifest.items():
+        tool = _load(name, entry["target"])
+        entry["description"] = tool.description
+        entry["parameters"] = tool.parameters
+    return manifest
+
+if __name__ == "__main__":
+    manifest = build_manifest()
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+    print(f"Wrote {len(manifest)} tools to {MANIFEST_PATH}")
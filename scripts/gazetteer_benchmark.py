@@ -0,0 +1,64 @@
+"""
+Measure gazetteer lookup latency and its effect on the weather cache hit rate.
+
+Replays a log of weather `location` arguments (one per line) and compares
+cache keys built from the sanitized text with keys canonicalized through
+the offline gazetteer. Hit rate assumes every lookup lands within the
+cache TTL, i.e. only the first lookup of each distinct key misses:
+
+    python scripts/gazetteer_benchmark.py --log scripts/data/weather_locations.txt
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.gazetteer import Gazetteer  # noqa: E402
+from app.tools.weather import sanitize_location  # noqa: E402
+
+def load_log(path: str):
+    """Read non-empty, non-comment lines from a query log."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+def hit_rate(keys) -> float:
+    return 1 - len(set(keys)) / len(keys) if keys else 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--log", default=os.path.join(ROOT, "scripts", "data", "weather_locations.txt"))
+    parser.add_argument("--rounds", type=int, default=200, help="Times to replay the log when timing lookups")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer()
+    load_ms = (time.perf_counter() - start) * 1000
+
+    locations = [sanitize_location(location) for location in load_log(args.log)]
+
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        for location in locations:
+            gazetteer.resolve(location)
+    lookup_us = (time.perf_counter() - start) * 1e6 / (args.rounds * len(locations))
+
+    raw_keys = locations
+    places = [gazetteer.resolve(location) for location in locations]
+    canonical_keys = [place["id"] if place else location for location, place in zip(locations, places)]
+    resolved = sum(place is not None for place in places)
+
+    print(f"Gazetteer: {len(gazetteer)} places, {len(gazetteer.index)} keys, loaded in {load_ms:.1f} ms")
+    print(f"Lookup latency: {lookup_us:.1f} us/lookup ({args.rounds} x {len(locations)} lookups)")
+    print(f"Resolved: {resolved}/{len(locations)} locations ({resolved / len(locations):.0%})")
+    print(f"Distinct cache keys: {len(set(raw_keys))} raw -> {len(set(canonical_keys))} canonical")
+    print(f"Cache hit rate: {hit_rate(raw_keys):.1%} raw -> {hit_rate(canonical_keys):.1%} canonical")
+
+    unresolved = sorted({location for location, place in zip(locations, places) if place is None})
+    if unresolved:
+        print(f"Unresolved: {', '.join(unresolved)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Measure the shared cache tier's effect on hit rate and throughput across worker processes.
+
+Starts N worker processes that each look up keys drawn from the same Zipf
+distribution (a few hot keys, a long tail), as uvicorn workers would for
+popular queries. A miss "fetches" the value (a sleep standing in for the
+upstream call) and stores it. Each worker count is run twice: with
+process-local caches only, and with the local cache backed by a shared
+mmap'd file:
+
+    python scripts/shared_cache_benchmark.py --workers 1 4 8
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.cache import SimpleCache  # noqa: E402
+from app.shared_cache import SharedCache  # noqa: E402
+
+def zipf_keys(count: int, distinct: int, skew: float, seed: int):
+    """Draw `count` keys from `distinct` keys with Zipf-distributed popularity."""
+    weights = [1 / (rank ** skew) for rank in range(1, distinct + 1)]
+    rng = random.Random(seed)
+    return [f"query-{rank}" for rank in rng.choices(range(distinct), weights=weights, k=count)]
+
+def worker(args, shared_path, seed, results):
+    shared = SharedCache(shared_path, slots=args.slots) if shared_path else None
+    cache = SimpleCache(default_ttl=300, shared=shared)
+    value = {"answer": "x" * args.value_bytes}
+    keys = zipf_keys(args.requests, args.keys, args.skew, seed)
+
+    hits = 0
+    # SimpleCache logs every lookup; keep the timing about the cache
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for key in keys:
+            if cache.get(key) is not None:
+                hits += 1
+            else:
+                time.sleep(args.miss_ms / 1000)
+                cache.set(key, value)
+        elapsed = time.perf_counter() - start
+    results.put((hits, len(keys), elapsed))
+
+def run(args, workers: int, shared: bool):
+    """Run `workers` processes in parallel; return (hit rate, total lookups/s)."""
+    with tempfile.TemporaryDirectory(dir="/dev/shm" if os.path.isdir("/dev/shm") else None) as directory:
+        shared_path = os.path.join(directory, "bench.cache") if shared else None
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=worker, args=(args, shared_path, seed, results))
+            for seed in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    hits = sum(outcome[0] for outcome in outcomes)
+    lookups = sum(outcome[1] for outcome in outcomes)
+    slowest = max(outcome[2] for outcome in outcomes)
+    return hits / lookups, lookups / slowest
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=2000, help="Lookups per worker")
+    parser.add_argument("--keys", type=int, default=1000, help="Distinct keys")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent")
+    parser.add_argument("--miss-ms", type=float, default=2.0, help="Simulated upstream latency per miss")
+    parser.add_argument("--value-bytes", type=int, default=1024)
+    parser.add_argument("--slots", type=int, default=4096)
+    args = parser.parse_args()
+
+    print(f"{args.requests} lookups/worker over {args.keys} keys (Zipf s={args.skew}), "
+          f"{args.miss_ms:g} ms per miss, {args.value_bytes} B values")
+    print(f"{'workers':>7}  {'local hit rate':>14}  {'shared hit rate':>15}  {'local ops/s':>11}  {'shared ops/s':>12}")
+    for workers in args.workers:
+        local_rate, local_ops = run(args, workers, shared=False)
+        shared_rate, shared_ops = run(args, workers, shared=True)
+        print(f"{workers:>7}  {local_rate:>14.1%}  {shared_rate:>15.1%}  {local_ops:>11,.0f}  {shared_ops:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
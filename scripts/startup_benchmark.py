@@ -0,0 +1,63 @@
+"""
+Measure cold-start import time of the app.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters and
+reports wall-clock time plus the slowest modules by cumulative import time:
+
+    python scripts/startup_benchmark.py --runs 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_once(module: str):
+    """Import `module` in a new interpreter and return (wall_ms, {module: (self_us, cumulative_us)})."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        # Format: "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return wall_ms, timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    walls, last = [], {}
+    for _ in range(args.runs):
+        wall_ms, last = run_once(args.module)
+        walls.append(wall_ms)
+
+    print(f"import {args.module}: median {statistics.median(walls):.1f} ms wall "
+          f"(min {min(walls):.1f}, max {max(walls):.1f}, {args.runs} runs)")
+    print(f"{len(last)} modules imported; slowest by cumulative time (last run):")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    ranked = sorted(last.items(), key=lambda item: item[1][1], reverse=True)
+    for name, (self_us, cumulative_us) in ranked[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {name}")
+
+    tool_modules = [name for name in last if name.startswith("app.tools.") and name != "app.tools.base"]
+    print(f"Tool modules imported at startup: {', '.join(tool_modules) or 'none'}")
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ setup(
     name="askwiseai",
     version="0.1.0",
     packages=find_packages(),
+    package_data={"app": ["data/*.tsv", "tools/manifest.json"]},
     install_requires=[
         "fastapi>=0.103.1",
         "uvicorn>=0.23.2",
@@ -11,6 +12,7 @@ setup(
         "pydantic>=2.3.0",
         "pydantic-settings>=2.0.3",
         "python-dotenv>=1.0.0",
+        "numpy>=1.24.0",
     ],
     author="Your Name",
     author_email="your.email@example.com",
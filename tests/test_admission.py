@@ -0,0 +1,97 @@
+import time
+import asyncio
+import httpx
+import pytest
+from unittest.mock import patch
+from app.admission import admission
+from app.cache import llm_cache
+from app.llm_service import LLMCacheMiss
+from app.main import app
+from app.metrics import metrics
+from app.tools.weather import WeatherTool
+
+async def slow_llm(prompt, *args, response_format=None, cache_only=False, **kwargs):
+    """Stand-in for an upstream LLM whose latency has spiked."""
+    if cache_only:
+        raise LLMCacheMiss("Not cached")
+    await asyncio.sleep(0.2)
+    if response_format:
+        return {"use_tool": False, "reasoning": "General knowledge"}
+    return "A slow answer."
+
+@pytest.mark.asyncio
+async def test_overload_sheds_with_retry_after():
+    metrics.reset()
+    admission._latency = None
+    transport = httpx.ASGITransport(app=app)
+    with patch('app.router.get_llm_response', side_effect=slow_llm), \
+         patch.object(admission, 'max_in_flight', 2), \
+         patch.object(admission, 'degrade_in_flight', 2):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            responses = await asyncio.gather(*[
+                client.post("/query", json={"query": f"Tell me a story about number {i}"})
+                for i in range(6)
+            ])
+    
+    statuses = sorted(response.status_code for response in responses)
+    assert statuses == [200, 200, 429, 429, 429, 429]
+    rejected = [response for response in responses if response.status_code == 429]
+    assert all(response.headers["Retry-After"] == str(admission.retry_after) for response in rejected)
+    assert admission.in_flight == 0
+
+@pytest.mark.asyncio
+async def test_high_latency_degrades_to_cache_and_templates():
+    metrics.reset()
+    llm_cache.clear()
+    for _ in range(10):
+        metrics.observe("llm.routing.gpt-4o-mini_ms", 30000)
+    admission._latency = None
+    
+    weather_tool = WeatherTool()
+    transport = httpx.ASGITransport(app=app)
+    with patch('app.router.get_llm_response', side_effect=slow_llm) as mock_llm, \
+         patch('app.router.get_tool', return_value=weather_tool), \
+         patch.object(weather_tool, 'execute', return_value={
+             "location": "London, United Kingdom", "temperature_c": 15.0, "temperature_f": 59.0,
+             "condition": "Sunny", "humidity": 40, "wind_kph": 5.0, "last_updated": "2023-10-15 14:30"
+         }):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            weather = await client.post("/query", json={"query": "What's the weather in London?"})
+            general = await client.post("/query", json={"query": "Who was Albert Einstein?"})
+    
+    # The weather lookup is answered from the template, and nothing calls the upstream LLM
+    assert weather.status_code == 200
+    assert "London, United Kingdom" in weather.json()["response"]
+    assert all(call.kwargs.get("cache_only") for call in mock_llm.call_args_list)
+    
+    # Uncached general questions are shed instead of waiting on the LLM
+    assert general.status_code == 503
+    assert "Retry-After" in general.headers
+    metrics.reset()
+    admission._latency = None
+
+def test_degrade_clears_once_latency_spike_ages_out():
+    metrics.reset()
+    admission._latency = None
+    for _ in range(10):
+        metrics.observe("llm.routing.gpt-4o-mini_ms", 30000)
+    
+    # Degraded requests make no upstream calls, so no new samples arrive
+    for _ in range(200):
+        assert admission.admit() == "degrade"
+        admission.release()
+    
+    later = time.monotonic() + admission.latency_max_age + 1
+    with patch('app.metrics.time.monotonic', return_value=later):
+        admission._latency = None
+        assert admission.admit() == "admit"
+        admission.release()
+        
+        # A fresh slow observation degrades again
+        metrics.observe("llm.routing.gpt-4o-mini_ms", 30000)
+        admission._latency = None
+        assert admission.admit() == "degrade"
+        admission.release()
+    
+    metrics.reset()
+    admission._latency = None
@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.deadline import Deadline, DeadlineExceeded, ClientDisconnected, run_with_deadline
+from app.llm_service import get_llm_response
+from app.cache import tool_cache
+from app.router import execute_tool
+from app.tools.base import Tool
+from app.tools.weather import WeatherTool
+
+def test_deadline_caps_hop_timeouts():
+    deadline = Deadline(5)
+    assert deadline.timeout(30.0) <= 5
+    assert deadline.timeout(1.0) == 1.0
+    
+    with pytest.raises(DeadlineExceeded):
+        Deadline(0).timeout(30.0)
+
+@pytest.mark.asyncio
+async def test_llm_timeout_uses_remaining_budget():
+    with patch('httpx.AsyncClient.post', new_callable=AsyncMock) as mock_post:
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"choices": [{"message": {"content": "Hello"}}]}
+        mock_post.return_value = mock_response
+        
+        await get_llm_response("Say hello", use_cache=False, deadline=Deadline(2))
+        
+        assert 0 < mock_post.call_args.kwargs["timeout"] <= 2
+
+@pytest.mark.asyncio
+async def test_run_with_deadline_times_out():
+    with pytest.raises(DeadlineExceeded):
+        await run_with_deadline(asyncio.sleep(10), Deadline(0.05))
+
+@pytest.mark.asyncio
+async def test_run_with_deadline_cancels_on_client_disconnect():
+    cancelled = asyncio.Event()
+    
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    checks = iter([False, True])
+    
+    async def is_disconnected():
+        return next(checks)
+    
+    with pytest.raises(ClientDisconnected):
+        await run_with_deadline(work(), Deadline(5), is_disconnected=is_disconnected, poll_interval=0.01)
+    assert cancelled.is_set()
+
+class LegacyPluginTool(Tool):
+    """A plugin tool whose execute predates the deadline keyword."""
+    
+    name = "legacy"
+    description = "Legacy plugin"
+    parameters = {"text": {"type": "string", "description": "Any text"}}
+    
+    async def execute(self, text: str):
+        return {"echo": text}
+
+@pytest.mark.asyncio
+async def test_execute_tool_only_passes_deadline_to_tools_that_accept_it():
+    deadline = Deadline(5)
+    assert await execute_tool(LegacyPluginTool(), {"text": "hi"}, deadline) == {"echo": "hi"}
+    
+    tool_cache.clear()
+    weather_tool = WeatherTool()
+    with patch.object(WeatherTool, '_fetch', new_callable=AsyncMock, return_value={"location": "x"}) as mock_fetch:
+        await execute_tool(weather_tool, {"location": "Atlantis"}, deadline)
+    assert mock_fetch.call_args.args[1] is deadline
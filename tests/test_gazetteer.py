@@ -0,0 +1,87 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.cache import tool_cache
+from app.gazetteer import gazetteer
+from app.metrics import metrics
+from app.utils.text_index import SortedKeyIndex, normalize_text
+from app.tools.weather import WeatherTool
+
+def test_sorted_key_index_exact_and_prefix():
+    index = SortedKeyIndex([("portland", 1), ("portland", 2), ("paris", 3), ("porto", 4)])
+    
+    assert index.exact("portland") == [1, 2]
+    assert index.exact("port") == []
+    assert index.prefix("port") == [1, 2, 4]
+    assert index.prefix("port", limit=1) == [1]
+
+def test_normalize_text():
+    assert normalize_text("  São-Paulo ") == "sao paulo"
+    assert normalize_text("Washington, D.C.") == "washington d c"
+
+@pytest.mark.parametrize("text, place_id", [
+    ("New York", "us-new-york"),
+    ("new york", "us-new-york"),
+    ("NYC", "us-new-york"),
+    ("New York, US", "us-new-york"),
+    ("Portland", "us-portland-or"),
+    ("Portland, ME", "us-portland-me"),
+    ("London UK", "gb-london"),
+    ("London, Ontario", "ca-london"),
+    ("Bengaluru", "in-bangalore"),
+    ("Reykj", "is-reykjavik"),
+    ("Atlantis", None),
+    ("Springfield, Missouri", None)
+])
+def test_gazetteer_resolve(text, place_id):
+    place = gazetteer.resolve(text)
+    assert (place["id"] if place else None) == place_id
+
+@pytest.mark.asyncio
+async def test_weather_tool_shares_cache_entry_across_spellings():
+    tool_cache.clear()
+    weather_tool = WeatherTool()
+    
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "location": {"name": "Manhattan", "country": "United States of America"},
+            "current": {
+                "temp_c": 20.0,
+                "temp_f": 68.0,
+                "condition": {"text": "Sunny"},
+                "humidity": 50,
+                "wind_kph": 5.0,
+                "last_updated": "2023-10-15 14:30"
+            }
+        }
+        mock_get.return_value = mock_response
+        
+        first = await weather_tool.execute(location="NYC")
+        second = await weather_tool.execute(location="New York, US")
+        
+        # One upstream call, by coordinates, reported under the canonical name
+        mock_get.assert_awaited_once()
+        assert mock_get.call_args.kwargs["params"]["q"] == "40.7128,-74.006"
+        assert first == second
+        assert first["location"] == "New York, United States"
+    
+    assert weather_tool.result_cache_key({"location": "new york"}) == "weather:us-new-york"
+    assert weather_tool.result_cache_key({"location": "Gotham"}) == "weather:Gotham"
+    tool_cache.clear()
+
+@pytest.mark.asyncio
+async def test_gazetteer_metrics_count_each_query_once():
+    tool_cache.clear()
+    metrics.reset()
+    weather_tool = WeatherTool()
+    tool_cache.set(weather_tool.cache_key("gb-london"), {"location": "London, United Kingdom"}, ttl=60)
+    
+    await weather_tool.execute(location="London")
+    # Cache key lookups (router, memory, warmer) aren't queries
+    weather_tool.result_cache_key({"location": "London"})
+    weather_tool.lookup_key({"location": "Gotham"})
+    
+    assert metrics.counters["gazetteer.hits"] == 1
+    assert metrics.counters["gazetteer.misses"] == 0
+    tool_cache.clear()
@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.cache import tool_cache
+from app.price_store import PriceStore
+from app.tools.history import PriceHistoryTool, window_stats
+
+def daily_series(closes, start="2024-01-01"):
+    """Build a TIME_SERIES_DAILY payload with one row per consecutive day."""
+    dates = np.arange(np.datetime64(start), np.datetime64(start) + len(closes))
+    return {
+        "Time Series (Daily)": {
+            str(date): {"4. close": str(close), "5. volume": "1000"}
+            for date, close in zip(dates[::-1], closes[::-1])
+        }
+    }
+
+def test_price_store_appends_incrementally_and_persists(tmp_path):
+    store = PriceStore(directory=str(tmp_path), mmap=True)
+    
+    assert store.append("AAPL", ["2024-01-02", "2024-01-01"], [101.0, 100.0], [10, 20]) == 2
+    # Overlapping rows are skipped, only the new day is added
+    assert store.append("AAPL", ["2024-01-02", "2024-01-03"], [101.0, 102.0], [10, 30]) == 1
+    
+    reopened = PriceStore(directory=str(tmp_path), mmap=True)
+    series = reopened.get("AAPL")
+    assert isinstance(series["close"], np.memmap)
+    assert list(series["close"]) == [100.0, 101.0, 102.0]
+    assert str(reopened.last_date("AAPL")) == "2024-01-03"
+    assert reopened.tickers() == ["AAPL"]
+
+def test_window_stats_aligns_and_ranks_tickers():
+    store = PriceStore()
+    store.append("AAA", ["2024-01-01", "2024-01-02", "2024-01-03"], [100.0, 110.0, 121.0], [1, 1, 1])
+    store.append("BBB", ["2024-01-02", "2024-01-03"], [50.0, 40.0], [1, 1])
+    
+    stats = window_stats({"AAA": store.get("AAA"), "BBB": store.get("BBB")}, days=21)
+    
+    # Only the two days both tickers traded are compared
+    assert stats["days"] == 1
+    assert stats["start_date"] == "2024-01-02"
+    assert stats["tickers"]["AAA"]["return_percent"] == 10.0
+    assert stats["tickers"]["BBB"]["return_percent"] == -20.0
+    assert stats["ranking"] == ["AAA", "BBB"]
+    assert stats["biggest_mover"] == "BBB"
+
+@pytest.mark.asyncio
+async def test_price_history_tool_fetches_once_and_computes_locally():
+    tool_cache.clear()
+    history_tool = PriceHistoryTool()
+    
+    def fake_get(url, params, timeout):
+        closes = [100.0, 102.0, 104.0, 108.0] if params["symbol"] == "AAPL" else [300.0, 297.0, 291.0, 270.0]
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = daily_series(closes)
+        return response
+    
+    with patch('app.tools.history.price_store', PriceStore()), \
+         patch('httpx.AsyncClient.get', new_callable=AsyncMock, side_effect=fake_get) as mock_get:
+        result = await history_tool.execute(tickers="Apple, MSFT", days=3)
+        again = await history_tool.execute(tickers="AAPL", days=2)
+    
+    # One series fetch per ticker; the second question is answered from the store
+    assert mock_get.await_count == 2
+    assert result["tickers"]["AAPL"]["return_percent"] == 8.0
+    assert result["tickers"]["MSFT"]["average_close"] == 289.5
+    assert result["biggest_mover"] == "MSFT"
+    assert again["days"] == 2 and again["tickers"]["AAPL"]["start_close"] == 102.0
+    assert history_tool.render(again, "AAPL over the last two days").startswith("Over the last 2 trading days")
+
+@pytest.mark.asyncio
+async def test_price_history_tool_serves_stored_series_after_a_failure():
+    tool_cache.clear()
+    history_tool = PriceHistoryTool()
+    store = PriceStore()
+    store.append("AAPL", ["2024-01-01", "2024-01-02"], [100.0, 110.0], [10, 10])
+    
+    rate_limited = MagicMock()
+    rate_limited.status_code = 200
+    rate_limited.json.return_value = {"Note": "API call frequency exceeded"}
+    
+    with patch('app.tools.history.price_store', store), \
+         patch('httpx.AsyncClient.get', new_callable=AsyncMock, return_value=rate_limited) as mock_get:
+        first = await history_tool.execute(tickers="AAPL", days=1)
+        # The failure is negatively cached, but the stored series still answers
+        second = await history_tool.execute(tickers="AAPL", days=1)
+    
+    assert mock_get.await_count == 1
+    assert first["tickers"]["AAPL"]["return_percent"] == 10.0
+    assert second["tickers"]["AAPL"]["return_percent"] == 10.0
+    tool_cache.clear()
+
+@pytest.mark.asyncio
+async def test_price_history_tool_rejects_empty_and_oversized_inputs():
+    history_tool = PriceHistoryTool()
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        empty = await history_tool.execute(tickers=" , ", days=5)
+        too_many = await history_tool.execute(tickers=", ".join(f"T{i}" for i in range(11)), days=5)
+    
+    assert "No stocks given" in empty["error"]
+    assert "at most 10" in too_many["error"]
+    mock_get.assert_not_awaited()
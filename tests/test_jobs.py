@@ -0,0 +1,109 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from app.jobs import JobQueue, JobQueueFull
+from app.main import app
+
+@pytest.mark.asyncio
+async def test_job_queue_runs_higher_priority_first():
+    order = []
+    release = asyncio.Event()
+    
+    async def handler(job):
+        if job["query"] == "blocker":
+            await release.wait()
+        order.append(job["query"])
+        return {"response": job["query"]}
+    
+    jobs = JobQueue(workers=1, result_ttl=60, max_queue_size=2)
+    jobs.start(handler)
+    try:
+        jobs.submit("blocker")
+        await asyncio.sleep(0)  # Let the worker pick up the blocker
+        low = jobs.submit("low", priority="low")
+        high = jobs.submit("high", priority="high")
+        assert jobs.depth() == {"high": 1, "normal": 0, "low": 1}
+        
+        with pytest.raises(JobQueueFull):
+            jobs.submit("overflow")
+        
+        release.set()
+        while jobs.get(low["job_id"])["status"] != "succeeded":
+            await asyncio.sleep(0.01)
+        
+        assert order == ["blocker", "high", "low"]
+        assert jobs.get(high["job_id"])["result"] == {"response": "high"}
+    finally:
+        await jobs.stop()
+
+@pytest.mark.asyncio
+async def test_job_results_expire_after_ttl():
+    jobs = JobQueue(workers=1, result_ttl=0)
+    jobs.start(AsyncMock(return_value={"response": "done"}))
+    try:
+        job = jobs.submit("query")
+        while jobs.jobs[job["job_id"]]["status"] != "succeeded":
+            await asyncio.sleep(0.01)
+        
+        time.sleep(0.01)
+        assert jobs.get(job["job_id"]) is None
+    finally:
+        await jobs.stop()
+
+def test_job_endpoints():
+    with patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm, \
+         TestClient(app) as client:
+        mock_llm.side_effect = [
+            {"use_tool": False, "reasoning": "General knowledge"},
+            "Paris is the capital of France."
+        ]
+        
+        response = client.post("/jobs", json={"query": "What is the capital of France?", "priority": "high"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        
+        for _ in range(100):
+            result = client.get(f"/jobs/{job_id}/result")
+            if result.status_code != 202:
+                break
+            time.sleep(0.01)
+        
+        assert result.status_code == 200
+        assert result.json()["response"] == "Paris is the capital of France."
+        assert client.get(f"/jobs/{job_id}").json()["status"] == "succeeded"
+        assert client.get("/jobs/unknown").status_code == 404
+
+@pytest.mark.asyncio
+async def test_stuck_jobs_are_failed_after_max_age():
+    release = asyncio.Event()
+    
+    async def handler(job):
+        await release.wait()
+        return {"response": "late"}
+    
+    jobs = JobQueue(workers=1, result_ttl=60, max_queue_size=1, max_age=30)
+    jobs.start(handler)
+    try:
+        running = jobs.submit("stuck")
+        await asyncio.sleep(0)  # Let the worker pick it up
+        queued = jobs.submit("waiting")
+        with pytest.raises(JobQueueFull):
+            jobs.submit("overflow")
+        
+        with patch('app.jobs.time.time', return_value=time.time() + 31):
+            jobs.clean_expired()
+            assert jobs.get(running["job_id"])["status"] == "failed"
+            assert jobs.get(queued["job_id"])["status"] == "failed"
+            assert jobs.depth()["normal"] == 0
+            assert jobs._running == 0
+        
+        # The queue slot is free again, and the stuck job keeps its failed outcome
+        jobs.submit("next")
+        release.set()
+        await asyncio.sleep(0.01)
+        assert jobs.get(running["job_id"])["result"] is None
+        assert jobs.get(running["job_id"])["status"] == "failed"
+    finally:
+        await jobs.stop()
@@ -0,0 +1,55 @@
+from app.cache import tool_cache
+from app.memory import ConversationMemory
+
+def test_memory_budget_evicts_least_recently_active():
+    memory = ConversationMemory(budget_bytes=7000)
+    first = memory.create_conversation()
+    second = memory.create_conversation()
+    memory.add_message(first, "user", "x" * 1000)
+    memory.add_message(second, "user", "y" * 1000)
+    
+    # Touching the first conversation makes the second the eviction candidate
+    memory.add_message(first, "assistant", "z" * 1000)
+    third = memory.create_conversation()
+    memory.add_message(third, "user", "w" * 2000)
+    
+    assert second not in memory.conversations
+    assert first in memory.conversations and third in memory.conversations
+    assert memory.total_bytes <= 7000
+
+def test_memory_accounting_tracks_trims_and_deletes():
+    memory = ConversationMemory(max_history=2)
+    conversation_id = memory.create_conversation()
+    empty_bytes = memory.total_bytes
+    
+    for i in range(5):
+        memory.add_message(conversation_id, "user", f"message {i}", metadata={"index": i})
+    assert memory.stats()["messages"] == 2
+    assert memory.content_bytes == sum(
+        len(m["content"]) + 400 for m in memory.get_messages(conversation_id)
+    )
+    
+    memory.delete_conversation(conversation_id)
+    assert memory.content_bytes == 0 and memory.metadata_bytes == 0
+    assert memory.total_bytes == empty_bytes - 600
+
+def test_tool_outputs_are_shared_with_the_cache_and_outlive_it():
+    tool_cache.clear()
+    cached = {"ticker": "AAPL", "price": "178.72"}
+    output = dict(cached)  # e.g. a copy deserialized by another layer
+    tool_cache.set("stocks:AAPL", cached)
+    
+    memory = ConversationMemory()
+    conversation_id = memory.create_conversation()
+    memory.add_message(conversation_id, "assistant", "AAPL is at $178.72", metadata={
+        "tool_used": "stocks",
+        "tool_output": output,
+        "tool_cache_key": "stocks:AAPL"
+    })
+    
+    message = memory.get_messages(conversation_id)[0]
+    assert message["metadata"]["tool_output"] is cached
+    
+    # The conversation keeps the output after the cache entry expires
+    tool_cache.clear()
+    assert memory.get_tool_output(message) == output
@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.cache import tool_cache
+from app.metrics import metrics
+from app.router import route_query
+from app.tools.base import ERROR_NOT_FOUND, ERROR_TRANSIENT
+from app.tools.stocks import StocksTool
+from app.tools.weather import WeatherTool
+from config import settings
+
+def api_response(status_code, data):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = data
+    return response
+
+@pytest.mark.asyncio
+async def test_not_found_location_is_negatively_cached():
+    tool_cache.clear()
+    metrics.reset()
+    weather_tool = WeatherTool()
+    
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        mock_get.return_value = api_response(400, {"error": {"code": 1006, "message": "No matching location found."}})
+        
+        first = await weather_tool.execute(location="Xyzabcville")
+        second = await weather_tool.execute(location="Xyzabcville")
+    
+    mock_get.assert_awaited_once()
+    assert first == second
+    assert first["error_type"] == ERROR_NOT_FOUND
+    assert metrics.counters["tool.weather.negative_hits"] == 1
+    remaining = tool_cache.ttl_remaining(weather_tool.cache_key("Xyzabcville"))
+    assert settings.NEGATIVE_CACHE_TRANSIENT_TTL < remaining <= settings.NEGATIVE_CACHE_NOT_FOUND_TTL
+    tool_cache.clear()
+
+@pytest.mark.asyncio
+async def test_rate_limited_quote_uses_transient_ttl():
+    tool_cache.clear()
+    stocks_tool = StocksTool()
+    
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        mock_get.return_value = api_response(200, {"Note": "API call frequency exceeded"})
+        result = await stocks_tool.execute(ticker="AAPL")
+    
+    assert result["error_type"] == ERROR_TRANSIENT
+    assert tool_cache.ttl_remaining(stocks_tool.cache_key("AAPL")) <= settings.NEGATIVE_CACHE_TRANSIENT_TTL
+    tool_cache.clear()
+
+@pytest.mark.asyncio
+async def test_tool_error_explanation_prompt_is_query_independent():
+    weather_tool = WeatherTool()
+    prompts = []
+    
+    async def fake_llm(prompt, stage="default", **kwargs):
+        if stage == "routing":
+            return {"use_tool": True, "tool_name": "weather", "tool_input": {"location": "Xyzabcville"},
+                    "reasoning": "Need real-time weather data", "confidence": 0.9}
+        prompts.append((stage, prompt))
+        return "I couldn't find a place called Xyzabcville. Please check the spelling."
+    
+    with patch('app.router.get_llm_response', side_effect=fake_llm), \
+         patch('app.router.get_tool', return_value=weather_tool), \
+         patch.object(weather_tool, 'execute', new_callable=AsyncMock) as mock_execute:
+        mock_execute.return_value = {"error": "Weather API error: No matching location found.", "error_type": ERROR_NOT_FOUND}
+        
+        first = await route_query("What's the weather in Xyzabcville?")
+        second = await route_query("Is it raining in Xyzabcville right now?")
+    
+    assert first["synthesis"] == second["synthesis"] == "error"
+    assert [stage for stage, _ in prompts] == ["tool_error", "tool_error"]
+    # Same failure, same prompt, so the second explanation is an LLM cache hit
+    assert prompts[0][1] == prompts[1][1]
+    assert "raining" not in prompts[1][1]
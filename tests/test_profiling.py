@@ -0,0 +1,153 @@
+import json
+import marshal
+import os
+import subprocess
+import sys
+import textwrap
+import httpx
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.main import app
+from app.admission import admission
+from app.profiling import profiler, to_speedscope
+
+@pytest.mark.asyncio
+async def test_profiling_endpoints_are_hidden_when_disabled():
+    transport = httpx.ASGITransport(app=app)
+    with patch.object(profiler, 'enabled', False):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/admin/profiling")
+    
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_requested_profile_is_captured_and_downloadable():
+    profiler.profiles.clear()
+    transport = httpx.ASGITransport(app=app)
+    with patch.object(profiler, 'enabled', True), \
+         patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm:
+        mock_llm.side_effect = [
+            {"use_tool": False, "reasoning": "General knowledge", "confidence": 0.9},
+            "Albert Einstein was a theoretical physicist."
+        ]
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/query", json={"query": "Who was Einstein?"}, headers={"X-Profile": "1"})
+            profile_id = response.headers["X-Profile-Id"]
+            
+            listing = (await client.get("/admin/profiling")).json()
+            pstats_file = await client.get(f"/admin/profiles/{profile_id}", params={"format": "pstats"})
+            speedscope = (await client.get(f"/admin/profiles/{profile_id}")).json()
+            missing = await client.get("/admin/profiles/unknown")
+    
+    assert response.status_code == 200
+    assert listing["profiles"][0]["profile_id"] == profile_id
+    assert listing["profiles"][0]["top_functions"]
+    assert listing["profiles"][0]["other_requests"] == 0
+    
+    # The pstats download is the marshalled stats dict pstats.Stats loads
+    stats = marshal.loads(pstats_file.content)
+    assert any(name == "route_query" for _, _, name in stats)
+    
+    frames = speedscope["shared"]["frames"]
+    profile = speedscope["profiles"][0]
+    assert any(frame["name"] == "route_query" for frame in frames)
+    assert len(profile["samples"]) == len(profile["weights"])
+    assert all(index < len(frames) for sample in profile["samples"] for index in sample)
+    assert missing.status_code == 404
+
+@pytest.mark.asyncio
+async def test_sample_rate_is_adjustable_at_runtime():
+    transport = httpx.ASGITransport(app=app)
+    with patch.object(profiler, 'enabled', True), patch.object(profiler, 'sample_rate', 0.0):
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.put("/admin/profiling", json={"sample_rate": 0.25})
+            invalid = await client.put("/admin/profiling", json={"sample_rate": 2})
+        
+        assert response.json() == {"sample_rate": 0.25}
+        assert profiler.sample_rate == 0.25
+        assert invalid.status_code == 422
+
+def test_speedscope_export_is_bounded_on_wide_call_graphs():
+    # 30 layers of 2 functions, each calling both functions of the next layer: 2^30 call paths
+    layers = [[("app.py", layer, f"f{layer}_{i}") for i in range(2)] for layer in range(30)]
+    stats = {}
+    for depth, layer in enumerate(layers):
+        for function in layer:
+            callers = {caller: (1, 1, 0.001, 1.0) for caller in layers[depth - 1]} if depth else {}
+            stats[function] = (2, 2, 0.002, 2.0 if depth else 1.0, callers)
+    
+    speedscope = to_speedscope(stats, "wide")
+    profile = speedscope["profiles"][0]
+    
+    assert len(profile["samples"]) <= 20000 + len(stats)
+    assert sum(profile["weights"]) == pytest.approx(sum(entry[2] for entry in stats.values()))
+
+def test_profile_counts_overlapping_requests():
+    profiler.profiles.clear()
+    with patch.object(profiler, 'enabled', True), \
+         patch.object(admission, 'in_flight', 3), patch.object(admission, 'admitted', 10):
+        # Two requests already in flight besides the profiled one, and one admitted meanwhile
+        with profiler.profile("busy", requested=True):
+            admission.admitted += 1
+    
+    assert profiler.profiles[-1]["other_requests"] == 3
+
+def test_speedscope_weights_never_exceed_cpu_time():
+    # Edge timings that charge the shared callee twice its own self time
+    root, left, right, shared = (("app.py", line, name) for line, name in enumerate(["root", "left", "right", "shared"]))
+    stats = {
+        root: (1, 1, 0.0, 2.0, {}),
+        left: (1, 1, 0.0, 1.0, {root: (1, 1, 0.0, 1.0)}),
+        right: (1, 1, 0.0, 1.0, {root: (1, 1, 0.0, 1.0)}),
+        shared: (2, 2, 1.0, 1.0, {left: (1, 1, 1.0, 1.0), right: (1, 1, 1.0, 1.0)})
+    }
+    
+    profile = to_speedscope(stats, "overlap")["profiles"][0]
+    
+    assert sum(profile["weights"]) == pytest.approx(1.0)
+    assert profile["endValue"] == pytest.approx(1.0)
+
+COLD_REQUEST = textwrap.dedent("""
+    import asyncio, json, time
+    from unittest.mock import patch, AsyncMock
+    from app.profiling import profiler
+
+    async def main():
+        profiler.enabled = True
+        # Import the app inside the profile so tool modules and indexes load cold
+        with profiler.profile("cold", requested=True) as profile_id:
+            import httpx
+            from app.main import app
+            with patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm:
+                mock_llm.side_effect = [
+                    {"use_tool": True, "tool_name": "weather", "tool_input": {"location": "London"},
+                     "reasoning": "Need real-time weather data", "confidence": 0.9},
+                    "Mild, take a jacket."
+                ]
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    await client.post("/query", json={"query": "Should I walk in London given the weather?"})
+        return profile_id
+
+    profile_id = asyncio.run(main())
+    start = time.perf_counter()
+    profile = profiler.export_speedscope(profile_id)["profiles"][0]
+    print(json.dumps({
+        "export_s": time.perf_counter() - start,
+        "samples": len(profile["samples"]),
+        "weights": sum(profile["weights"]),
+        "cpu_s": profiler.get(profile_id)["cpu_ms"] / 1000
+    }))
+""")
+
+def test_speedscope_export_of_cold_request_finishes_quickly():
+    # A fresh interpreter, since this process has already imported everything
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_REQUEST], capture_output=True, text=True, timeout=60, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+    
+    assert summary["export_s"] < 5
+    assert summary["samples"] > 0
+    assert summary["weights"] == pytest.approx(summary["cpu_s"], rel=0.01)
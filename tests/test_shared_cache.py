@@ -0,0 +1,135 @@
+import multiprocessing
+import time
+import pytest
+from unittest.mock import patch
+from config import settings
+from app.cache import SimpleCache, shared_tier
+from app.shared_cache import SharedCache
+
+def write_entry(path):
+    cache = SharedCache(path, slots=64, slot_size=512)
+    cache.set("from-child", {"pid": "child"}, time.time() + 60)
+    cache.close()
+
+@pytest.fixture
+def open_cache(tmp_path):
+    """Open SharedCaches on a file in tmp_path, closing them after the test."""
+    caches = []
+    def open_cache(slots=64, slot_size=512, name="shared.cache"):
+        caches.append(SharedCache(str(tmp_path / name), slots=slots, slot_size=slot_size))
+        return caches[-1]
+    yield open_cache
+    for cache in caches:
+        cache.close()
+
+def test_entries_are_shared_between_mappings(open_cache):
+    writer = open_cache()
+    reader = open_cache()
+
+    expiry = time.time() + 60
+    assert writer.set("key", {"temperature": 21.5}, expiry)
+    assert reader.get("key") == ({"temperature": 21.5}, expiry)
+
+    writer.delete("key")
+    assert reader.get("key") is None
+
+def test_entries_are_shared_between_processes(open_cache):
+    cache = open_cache()
+
+    process = multiprocessing.get_context("fork").Process(target=write_entry, args=(cache.path,))
+    process.start()
+    process.join()
+
+    assert cache.get("from-child")[0] == {"pid": "child"}
+
+def test_expired_and_oversized_entries(open_cache):
+    cache = open_cache()
+
+    cache.set("old", "value", time.time() - 1)
+    assert cache.get("old") is None
+    assert cache.stats()["entries"] == 0
+
+    assert not cache.set("big", "x" * 1024, time.time() + 60)
+    assert cache.get("big") is None
+
+def test_full_probe_window_evicts_the_earliest_expiry(open_cache):
+    cache = open_cache(slots=4, slot_size=256)
+
+    now = time.time()
+    for i in range(4):
+        cache.set(f"key-{i}", i, now + 10 + i)
+    cache.set("new", "value", now + 100)
+
+    assert cache.get("new") == ("value", now + 100)
+    assert cache.get("key-0") is None
+    assert cache.stats()["entries"] == 4
+
+def key_probing_from(cache, index):
+    return next(f"key-{i}" for i in range(1000) if cache._candidates(cache._digest(f"key-{i}"))[0] == index)
+
+def test_refreshed_key_replaces_its_own_slot(open_cache):
+    cache = open_cache(slots=4, slot_size=256)
+
+    now = time.time()
+    # A key ahead of k in k's probe order, so k=OLD lands in its second slot
+    ahead = key_probing_from(cache, cache._candidates(cache._digest("k"))[0])
+    cache.set(ahead, "ahead", now + 50)
+    cache.set("k", "OLD", now + 100)
+    cache.set("other-1", 1, now + 50)
+    cache.set("other-2", 2, now + 50)
+
+    cache.set(ahead, "ahead", now - 1)  # Expire the slot ahead of k
+    cache.set("k", "NEW", now + 20)
+    cache.set("z", "value", now + 100)
+
+    assert cache.get("k") == ("NEW", now + 20)
+    assert cache.get("z") == ("value", now + 100)
+
+def test_mismatched_layout_is_refused_without_touching_the_file(open_cache):
+    cache = open_cache()
+    cache.set("key", "value", time.time() + 60)
+
+    with pytest.raises(ValueError):
+        open_cache(slots=128)
+    assert cache.get("key")[0] == "value"
+
+def test_shared_tier_files_are_named_by_layout(tmp_path):
+    with patch.multiple(settings, SHARED_CACHE_ENABLED=True, SHARED_CACHE_DIR=str(tmp_path), SHARED_CACHE_SLOTS=64):
+        small = shared_tier("tool")
+        with patch.object(settings, 'SHARED_CACHE_SLOTS', 128):
+            large = shared_tier("tool")
+    try:
+        assert small.path != large.path
+        assert (small.slots, large.slots) == (64, 128)
+    finally:
+        small.close()
+        large.close()
+
+def test_simple_cache_falls_through_to_shared_tier(open_cache):
+    worker_a = SimpleCache(default_ttl=60, shared=open_cache())
+    worker_b = SimpleCache(default_ttl=60, shared=open_cache())
+
+    worker_a.set({"tool": "weather", "location": "london"}, {"temperature": 12})
+
+    assert worker_b.peek({"tool": "weather", "location": "london"}) == {"temperature": 12}
+    assert worker_b.stats()["entries"] == 1  # Copied into the local tier
+    assert 0 < worker_b.ttl_remaining({"tool": "weather", "location": "london"}) <= 60
+
+    worker_b.clear()
+    assert worker_a.shared.get(worker_a._get_key({"tool": "weather", "location": "london"})) is None
+
+def test_local_copies_are_dropped_when_another_worker_writes(open_cache):
+    worker_a = SimpleCache(default_ttl=60, shared=open_cache())
+    worker_b = SimpleCache(default_ttl=60, shared=open_cache())
+    key = {"tool": "stocks", "ticker": "AAPL"}
+
+    worker_a.set(key, {"error": "Upstream unavailable"}, ttl=30)
+    assert worker_b.get(key) == {"error": "Upstream unavailable"}
+
+    worker_a.set(key, {"price": 187.5})
+    assert worker_b.get(key) == {"price": 187.5}
+    assert worker_b.peek(key) == {"price": 187.5}
+
+    worker_a.clear()
+    assert worker_b.get(key) is None
+    assert worker_b.stats()["entries"] == 0
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.router import route_query
+from app.metrics import metrics
+from app.popularity import PopularityTracker
+from app.speculation import guess_tool_call
+from app.tools.weather import WeatherTool
+
+def test_guess_tool_call():
+    assert guess_tool_call("What's the weather in New York?") == ("weather", {"location": "New York"})
+    assert guess_tool_call("What is the stock price of AAPL today?") == ("stocks", {"ticker": "AAPL"})
+    assert guess_tool_call("Who was Albert Einstein?") is None
+
+@pytest.mark.asyncio
+async def test_speculative_tool_call_is_reused():
+    metrics.reset()
+    weather_tool = WeatherTool()
+    tracker = PopularityTracker()
+    with patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm, \
+         patch('app.router.get_tool', return_value=weather_tool), \
+         patch('app.router.popularity', tracker), \
+         patch.object(weather_tool, 'execute', new_callable=AsyncMock) as mock_execute:
+        
+        mock_execute.return_value = {"error": "No matching location found."}
+        mock_llm.side_effect = [
+            {"use_tool": True, "tool_name": "weather", "tool_input": {"location": "london"}, "reasoning": "Need real-time weather data"},
+            "I couldn't find that location."
+        ]
+        
+        result = await route_query("What's the weather in London?")
+        
+        # The speculative call is the only tool call
+        mock_execute.assert_awaited_once_with(location="London")
+        assert result["tool_used"] == "weather"
+        assert metrics.counters["speculation.tool.hits"] == 1
+        assert tracker.top_k(10) == [("weather", weather_tool.lookup_key({"location": "london"}))]
+
+@pytest.mark.asyncio
+async def test_speculative_tool_call_is_cancelled_on_miss():
+    metrics.reset()
+    weather_tool = WeatherTool()
+    cancelled = asyncio.Event()
+    
+    async def slow_execute(**kwargs):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+    
+    tracker = PopularityTracker()
+    with patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm, \
+         patch('app.router.get_tool', return_value=weather_tool), \
+         patch('app.router.popularity', tracker), \
+         patch.object(weather_tool, 'execute', side_effect=slow_execute):
+        
+        responses = iter([
+            {"use_tool": False, "reasoning": "Asking about climate in general"},
+            "London has a temperate oceanic climate."
+        ])
+        
+        async def slow_llm(*args, **kwargs):
+            # Give the speculative call time to start
+            await asyncio.sleep(0.01)
+            return next(responses)
+        
+        mock_llm.side_effect = slow_llm
+        
+        result = await route_query("What's the weather usually like in London?")
+        await asyncio.wait_for(cancelled.wait(), timeout=1)
+        
+        assert "tool_used" not in result
+        assert metrics.counters["speculation.tool.misses"] == 1
+        # The discarded speculative lookup doesn't count towards popularity
+        assert tracker.top_k(10) == []
+        # ...and its truncated latency doesn't pull down the admission p90
+        assert "tool.weather_ms" not in metrics.timings
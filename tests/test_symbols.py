@@ -0,0 +1,113 @@
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+from app.cache import tool_cache
+from app.llm_service import LLMCacheMiss
+from app.router import route_degraded, DegradedResponseUnavailable
+from app.speculation import guess_tool_call, same_tool_call
+from app.symbols import symbol_index, resolve_ticker
+from app.tools.stocks import StocksTool
+from config import settings
+
+@pytest.mark.parametrize("text, ticker", [
+    ("msft", "MSFT"),
+    ("Microsoft", "MSFT"),
+    ("Microsoft Corp", "MSFT"),
+    ("Microsfot", "MSFT"),
+    ("Coca Cola", "KO"),
+    ("Bank of America", "BAC"),
+    ("XYZQ", None),
+    # Unlisted symbols aren't rewritten to a similar listed company
+    ("UPST", None),
+    ("FORD", None),
+    ("METAX", None),
+    ("upst", None),
+    ("ford", "F"),
+    ("the", None)
+])
+def test_symbol_index_resolve(text, ticker):
+    assert symbol_index.resolve(text) == ticker
+
+def test_resolve_ticker_passes_unlisted_symbols_through():
+    assert resolve_ticker("UPST") == "UPST"
+    assert resolve_ticker("FORD") == "FORD"
+    assert resolve_ticker("Microsoft") == "MSFT"
+
+def test_symbol_index_find_in_text():
+    assert symbol_index.find_in_text("How is Microsoft doing today?") == "MSFT"
+    assert symbol_index.find_in_text("Share price of Bank of America") == "BAC"
+    assert symbol_index.find_in_text("What's the weather in London?") is None
+
+def test_guess_tool_call_resolves_company_names():
+    assert guess_tool_call("How is Microsoft doing today?") == ("stocks", {"ticker": "MSFT"})
+    # Upper-case words that aren't listed are skipped in favour of the company name
+    assert guess_tool_call("What is the NYSE price of Nvidia?") == ("stocks", {"ticker": "NVDA"})
+    assert same_tool_call(("stocks", {"ticker": "MSFT"}), ("stocks", {"ticker": "Microsoft"}))
+
+@pytest.mark.parametrize("query, ticker", [
+    ("What is the price of a visa to Canada?", None),
+    ("price of a Delta flight to Paris", None),
+    ("price of Shell gas", None),
+    ("How is Microsoft doing today?", None),
+    ("How is Microsoft stock doing?", "MSFT"),
+    ("Delta shares price", "DAL"),
+    ("What is the price of AAPL?", "AAPL"),
+    ("What is the stock price of CRWD?", "CRWD"),
+    ("$UPST price", "UPST")
+])
+def test_strict_guess_needs_an_explicit_stock_request(query, ticker):
+    guess = guess_tool_call(query, strict=True)
+    assert guess == (("stocks", {"ticker": ticker}) if ticker else None)
+
+@pytest.mark.asyncio
+async def test_degraded_route_does_not_answer_ordinary_words_with_quotes():
+    with patch('app.router.get_llm_response', new_callable=AsyncMock, side_effect=LLMCacheMiss("Not cached")), \
+         patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        with pytest.raises(DegradedResponseUnavailable):
+            await route_degraded("What is the price of a visa to Canada?")
+    mock_get.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_stocks_tool_rejects_unlisted_ticker_without_api_call():
+    stocks_tool = StocksTool()
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get, \
+         patch.object(settings, 'REJECT_UNLISTED_TICKERS', True):
+        result = await stocks_tool.execute(ticker="XYZQ")
+        assert stocks_tool.result_cache_key({"ticker": "XYZQ"}) is None
+    
+    assert "error" in result
+    mock_get.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_stocks_tool_passes_unlisted_ticker_to_api_by_default():
+    tool_cache.clear()
+    stocks_tool = StocksTool()
+    response = MagicMock()
+    response.status_code = 200
+    response.json.return_value = {"Global Quote": {
+        "01. symbol": "CRWD", "05. price": "350.00", "09. change": "2.50",
+        "10. change percent": "0.72%", "07. latest trading day": "2024-01-02"
+    }}
+    
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        mock_get.return_value = response
+        result = await stocks_tool.execute(ticker="CRWD")
+    
+    mock_get.assert_awaited_once()
+    assert mock_get.call_args.kwargs["params"]["symbol"] == "CRWD"
+    assert "error" not in result
+    assert guess_tool_call("What is the stock price of CRWD?") == ("stocks", {"ticker": "CRWD"})
+    tool_cache.clear()
+
+@pytest.mark.asyncio
+async def test_stocks_tool_normalizes_company_names():
+    tool_cache.clear()
+    stocks_tool = StocksTool()
+    tool_cache.set(stocks_tool.cache_key("MSFT"), {"ticker": "MSFT", "price": "420.00"}, ttl=60)
+    
+    with patch('httpx.AsyncClient.get', new_callable=AsyncMock) as mock_get:
+        result = await stocks_tool.execute(ticker="Microsoft")
+    
+    mock_get.assert_not_awaited()
+    assert result["ticker"] == "MSFT"
+    assert stocks_tool.result_cache_key({"ticker": "microsoft corp"}) == "stocks:MSFT"
+    tool_cache.clear()
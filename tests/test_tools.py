@@ -1,5 +1,9 @@
+import os
+import subprocess
+import sys
 import pytest
 from unittest.mock import patch, AsyncMock
+from app.tools import get_tool, list_tools
 from app.tools.weather import WeatherTool
 from app.tools.stocks import StocksTool
 
@@ -59,4 +63,54 @@ async def test_stocks_tool():
         
         assert result["ticker"] == "AAPL"
         assert result["price"] == "178.72"
-        assert result["change"] == "1.45" 
\ No newline at end of file
+        assert result["change"] == "1.45" 
+
+def test_tool_render_templates():
+    weather_output = {
+        "location": "London, United Kingdom",
+        "temperature_c": 15.0,
+        "temperature_f": 59.0,
+        "condition": "Partly cloudy",
+        "humidity": 76,
+        "wind_kph": 11.2,
+        "last_updated": "2023-10-15 14:30"
+    }
+    stock_output = {
+        "ticker": "AAPL",
+        "price": "178.7200",
+        "change": "-1.4500",
+        "change_percent": "-0.8200%",
+        "volume": "48300000",
+        "latest_trading_day": "2023-10-15"
+    }
+    
+    weather_answer = WeatherTool().render(weather_output, "weather in London?")
+    assert "London, United Kingdom" in weather_answer
+    assert "partly cloudy" in weather_answer
+    # The same query always gets the same phrasing
+    assert weather_answer == WeatherTool().render(weather_output, "weather in London?")
+    
+    stock_answer = StocksTool().render(stock_output, "AAPL price?")
+    assert "$178.72" in stock_answer
+    assert "down 1.45" in stock_answer
+    assert "0.8200%" in stock_answer
+    
+    # Errors are left to the LLM to explain
+    assert StocksTool().render({"error": "No data found"}, "AAPL price?") is None
+
+def test_list_tools_does_not_import_tool_modules():
+    code = (
+        "import sys; from app.tools import list_tools; "
+        "assert set(list_tools()) >= {'weather', 'stocks'}; "
+        "print('app.tools.weather' in sys.modules or 'app.tools.stocks' in sys.modules)"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                          cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert proc.stdout.strip() == "False"
+
+def test_tool_manifest_matches_tool_classes():
+    for name, info in list_tools().items():
+        tool = get_tool(name)
+        assert tool.name == name
+        assert info["description"] == tool.description
+        assert info["parameters"] == tool.parameters
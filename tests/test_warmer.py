@@ -0,0 +1,85 @@
+import pytest
+from unittest.mock import patch, AsyncMock
+from app.cache import tool_cache
+from app.popularity import PopularityTracker
+from app.warmer import CacheWarmer
+from app.tools.weather import WeatherTool
+
+def test_popularity_top_k():
+    tracker = PopularityTracker(half_life=60)
+    for _ in range(3):
+        tracker.record("stocks", "AAPL")
+    tracker.record("stocks", "MSFT")
+    tracker.record("weather", "London")
+    tracker.record("weather", "London")
+    
+    assert tracker.top_k(2) == [("stocks", "AAPL"), ("weather", "London")]
+    assert tracker.score("stocks", "AAPL") == pytest.approx(3, rel=0.01)
+
+@pytest.mark.asyncio
+async def test_warmer_refreshes_expiring_keys_within_quota():
+    tool_cache.clear()
+    tracker = PopularityTracker()
+    tracker.record("weather", "London")
+    tracker.record("weather", "Paris")
+    tracker.record("weather", "Paris")
+    tracker.record("weather", "Tokyo")
+    
+    # Tokyo is comfortably fresh, the others are about to expire
+    weather_tool = WeatherTool()
+    tool_cache.set(weather_tool.cache_key("Tokyo"), {"location": "Tokyo, Japan"}, ttl=600)
+    tool_cache.set(weather_tool.cache_key("London"), {"location": "London, United Kingdom"}, ttl=30)
+    tool_cache.set(weather_tool.cache_key("Paris"), {"location": "Paris, France"}, ttl=30)
+    
+    warmer = CacheWarmer(tracker, top_k=10, refresh_ahead=60, max_refreshes_per_hour=1)
+    with patch('app.warmer.get_tool', return_value=weather_tool), \
+         patch.object(weather_tool, 'refresh', new_callable=AsyncMock) as mock_refresh:
+        mock_refresh.return_value = {"location": "Paris, France"}
+        
+        assert await warmer.warm_once() == 1
+        # Only the most popular key fits in the quota
+        mock_refresh.assert_awaited_once_with("Paris")
+
+@pytest.mark.asyncio
+async def test_warmer_skips_negatively_cached_keys():
+    tool_cache.clear()
+    tracker = PopularityTracker()
+    tracker.record("weather", "Xyzabcville")
+    
+    weather_tool = WeatherTool()
+    tool_cache.set(weather_tool.cache_key("Xyzabcville"), {"error": "No matching location found."}, ttl=30)
+    
+    warmer = CacheWarmer(tracker, top_k=10, refresh_ahead=60, max_refreshes_per_hour=10)
+    with patch('app.warmer.get_tool', return_value=weather_tool), \
+         patch.object(weather_tool, 'refresh', new_callable=AsyncMock) as mock_refresh:
+        assert await warmer.warm_once() == 0
+        mock_refresh.assert_not_awaited()
+    tool_cache.clear()
+
+@pytest.mark.asyncio
+async def test_warmer_leaves_cold_and_uncached_keys_alone():
+    tool_cache.clear()
+    tracker = PopularityTracker(half_life=60)
+    tracker.record("weather", "London")
+    tracker.record("weather", "Paris")
+    
+    weather_tool = WeatherTool()
+    tool_cache.set(weather_tool.cache_key("London"), {"location": "London, United Kingdom"}, ttl=30)
+    
+    warmer = CacheWarmer(tracker, top_k=10, refresh_ahead=60, max_refreshes_per_hour=10, min_score=0.5)
+    with patch('app.warmer.get_tool', return_value=weather_tool), \
+         patch.object(weather_tool, 'refresh', new_callable=AsyncMock) as mock_refresh, \
+         patch('app.popularity.time.time', return_value=tracker.landmark + 600):
+        # Ten half-lives later London is still in the top k, but nobody wants it
+        assert ("weather", "London") in tracker.top_k(10)
+        assert await warmer.warm_once() == 0
+        mock_refresh.assert_not_awaited()
+    
+    with patch('app.warmer.get_tool', return_value=weather_tool), \
+         patch.object(weather_tool, 'refresh', new_callable=AsyncMock) as mock_refresh:
+        mock_refresh.return_value = {"location": "London, United Kingdom"}
+        
+        # While popular, only the cached entry is refreshed; Paris isn't cached
+        assert await warmer.warm_once() == 1
+        mock_refresh.assert_awaited_once_with("London")
+    tool_cache.clear()
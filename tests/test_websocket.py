@@ -0,0 +1,122 @@
+import asyncio
+import re
+from unittest.mock import patch, AsyncMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.memory import conversation_memory
+
+def receive_until(websocket, event_type, turn):
+    events = []
+    while True:
+        event = websocket.receive_json()
+        events.append(event)
+        if event["type"] == event_type and event.get("turn") == turn:
+            return events
+
+def streaming_llm(responses):
+    """Fake get_llm_response that streams text responses word by word."""
+    responses = iter(responses)
+    
+    async def fake(*args, on_token=None, **kwargs):
+        response = next(responses)
+        if on_token is not None:
+            for word in re.findall(r"\S+\s*", response):
+                await on_token(word)
+        return response
+    return fake
+
+def test_websocket_pipelined_turns():
+    client = TestClient(app)
+    with patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm:
+        mock_llm.side_effect = streaming_llm([
+            {"use_tool": False, "reasoning": "General knowledge"},
+            "Paris is the capital of France.",
+            {"use_tool": False, "reasoning": "Follow-up question"},
+            "About 2.1 million people live in Paris."
+        ])
+        
+        with client.websocket_connect("/ws/conversation") as websocket:
+            session = websocket.receive_json()
+            assert session["type"] == "session"
+            
+            # Send both turns without waiting for the first answer
+            websocket.send_json({"type": "query", "query": "What is the capital of France?"})
+            websocket.send_json({"type": "query", "query": "How many people live there?"})
+            
+            events = receive_until(websocket, "answer", 2)
+            answers = [event for event in events if event["type"] == "answer"]
+            tokens = [event["text"] for event in events if event["type"] == "token" and event["turn"] == 1]
+            
+            assert [answer["turn"] for answer in answers] == [1, 2]
+            assert answers[0]["response"] == "Paris is the capital of France."
+            assert "".join(tokens) == "Paris is the capital of France."
+            
+            # The second routing prompt includes the first answer from the session context
+            second_routing_prompt = mock_llm.call_args_list[2].args[0]
+            assert "Assistant: Paris is the capital of France." in second_routing_prompt
+
+def test_websocket_cancel_in_flight_turn():
+    client = TestClient(app)
+    
+    async def slow_llm(*args, **kwargs):
+        await asyncio.sleep(10)
+    
+    with patch('app.router.get_llm_response', side_effect=slow_llm):
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.receive_json()
+            websocket.send_json({"type": "query", "query": "Tell me a long story"})
+            receive_until(websocket, "queued", 1)
+            
+            websocket.send_json({"type": "cancel"})
+            events = receive_until(websocket, "cancelled", 1)
+            assert not any(event["type"] == "answer" for event in events)
+
+def test_websocket_cancelled_question_is_not_in_next_context():
+    client = TestClient(app)
+    prompts = []
+    
+    async def fake_llm(prompt, *args, response_format=None, **kwargs):
+        prompts.append(prompt)
+        if "long story" in prompt:
+            await asyncio.sleep(10)
+        if response_format:
+            return {"use_tool": False, "reasoning": "General knowledge"}
+        return "Paris is the capital of France."
+    
+    with patch('app.router.get_llm_response', side_effect=fake_llm):
+        with client.websocket_connect("/ws/conversation") as websocket:
+            conversation_id = websocket.receive_json()["conversation_id"]
+            websocket.send_json({"type": "query", "query": "Tell me a long story"})
+            receive_until(websocket, "queued", 1)
+            websocket.send_json({"type": "cancel"})
+            receive_until(websocket, "cancelled", 1)
+            
+            websocket.send_json({"type": "query", "query": "What is the capital of France?"})
+            receive_until(websocket, "answer", 2)
+    
+    assert "long story" not in prompts[-1]
+    messages = conversation_memory.get_messages(conversation_id)
+    assert [message["content"] for message in messages] == [
+        "What is the capital of France?", "Paris is the capital of France."
+    ]
+
+def test_websocket_malformed_messages_keep_session_open():
+    client = TestClient(app)
+    with patch('app.router.get_llm_response', new_callable=AsyncMock) as mock_llm:
+        mock_llm.side_effect = [
+            {"use_tool": False, "reasoning": "General knowledge"},
+            "Paris is the capital of France."
+        ]
+        
+        with client.websocket_connect("/ws/conversation") as websocket:
+            websocket.receive_json()
+            websocket.send_text("not json")
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_json(["query", "What is the capital of France?"])
+            assert websocket.receive_json()["type"] == "error"
+            websocket.send_bytes(b"\xff")
+            assert websocket.receive_json()["type"] == "error"
+            
+            websocket.send_json({"type": "query", "query": "What is the capital of France?"})
+            events = receive_until(websocket, "answer", 1)
+            assert events[-1]["response"] == "Paris is the capital of France."